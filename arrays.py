@@ -0,0 +1,12 @@
+"""Optional NumPy support. The array backed versions of the body store, the
+particle pool and the framebuffer are only used when NumPy is installed."""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def use_numpy(use_arrays: bool) -> bool:
+    '''Returns True if the NumPy version should be used: [use_arrays] is set
+    and NumPy is available'''
+    return use_arrays and np is not None
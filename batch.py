@@ -0,0 +1,173 @@
+"""Runs many headless, seeded games in parallel, one process per core, to
+balance the settings of config.py without playing. Every combination of the
+--set values is played with the same seeds, the result of each game is
+appended to a JSON lines file as soon as it finishes and the games of each
+combination are summarized in one report at the end.
+Usage: python batch.py --games 20 --set ASTEROID_SPEED=0.3,0.4 --set RELOAD_RATE=10,20"""
+import argparse
+import ast
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import config
+from config import *
+from inputs import PROVIDERS, make_input_provider
+from profiler import FrameProfiler
+from world import World
+
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def set_setting(name: str, value) -> None:
+    """Sets a config.py setting in config and in every game module, they
+    copied the settings with 'from config import *'"""
+    for module in list(sys.modules.values()):
+        filename = getattr(module, "__file__", None)
+        if filename and os.path.dirname(os.path.abspath(filename)) == GAME_DIR and hasattr(module, name):
+            setattr(module, name, value)
+
+
+def check_settings(overrides: dict) -> None:
+    for name in overrides:
+        if not name.isupper() or not hasattr(config, name):
+            raise ValueError(f"{name} is not a setting of config.py")
+
+
+def run_game(seed: int, inputs: str, max_frames: int, overrides: dict) -> dict:
+    """Plays a game with the [inputs] provider until it's over or for [max_frames],
+    with the [overrides] of the settings. It's run in the worker processes."""
+    check_settings(overrides)
+    defaults = {name: getattr(config, name) for name in overrides}
+    for name, value in overrides.items():
+        set_setting(name, value)
+    try:
+        input_provider = make_input_provider(inputs)
+        profiler = FrameProfiler(window=max_frames)
+        world = World(profiler, seed=seed, use_arrays=config.ARRAY_PHYSICS)
+        start = time.perf_counter()
+        while world.frames < max_frames and not world.is_game_over:
+            profiler.begin_frame()
+            world.step(input_provider.get_input(world))
+            profiler.end_frame()
+        elapsed = time.perf_counter()-start
+    finally:
+        for name, value in defaults.items():
+            set_setting(name, value)
+    return {"seed": seed,
+            "inputs": inputs,
+            "overrides": overrides,
+            "rounds": world.levels,
+            "score": world.score,
+            "frames": world.frames,
+            "is_game_over": world.is_game_over,
+            "frame_ms": elapsed/max(world.frames, 1)*1000,
+            "frame_p95_ms": profiler.get_frame_percentiles()["p95"],
+            "checksum": world.get_checksum()}
+
+
+def get_combinations(settings: dict[str, list]) -> list[dict]:
+    """Returns every combination of the values of [settings]"""
+    names = list(settings)
+    return [dict(zip(names, values)) for values in itertools.product(*settings.values())]
+
+
+def parse_setting(text: str) -> tuple[str, list]:
+    '''Parses NAME=VALUE1,VALUE2,... into the name and the list of values'''
+    name, separator, values = text.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE1,VALUE2,... not {text}")
+    try:
+        return name.strip(), [ast.literal_eval(value.strip()) for value in values.split(",")]
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"invalid value in {text}")
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {"mean": sum(values)/len(values), "min": min(values), "max": max(values)}
+
+
+def aggregate(results: list[dict]) -> list[dict]:
+    """Groups the games by their settings and summarizes the groups,
+    the ones reaching the most rounds first"""
+    groups = {}
+    for result in results:
+        groups.setdefault(json.dumps(result["overrides"], sort_keys=True), []).append(result)
+    report = []
+    for games in groups.values():
+        played = [game for game in games if "error" not in game]
+        entry = {"overrides": games[0]["overrides"], "games": len(played), "errors": len(games)-len(played)}
+        if played:
+            for key in ("rounds", "score", "frames", "frame_ms", "frame_p95_ms"):
+                entry[key] = summarize([game[key] for game in played])
+        report.append(entry)
+    report.sort(key=lambda entry: entry.get("rounds", {}).get("mean", -1), reverse=True)
+    return report
+
+
+def print_entry(entry: dict) -> None:
+    settings = " ".join(f"{name}={value}" for name, value in entry["overrides"].items()) or "defaults"
+    if not entry["games"]:
+        print(f"{settings}: {entry['errors']} failed games")
+        return
+    print(f"{settings}: {entry['games']} games, rounds {entry['rounds']['mean']:.1f} "
+          f"(max {entry['rounds']['max']}), score {entry['score']['mean']:.1f}, "
+          f"frames {entry['frames']['mean']:.0f}, {entry['frame_ms']['mean']:.3f} ms/frame")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Runs seeded headless games in parallel")
+    parser.add_argument("--games", type=int, default=10, help="games per combination of the settings")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the next ones count up")
+    parser.add_argument("--frames", type=int, default=BATCH_MAX_FRAMES, help="frame limit of a game")
+    parser.add_argument("--inputs", choices=[name for name in PROVIDERS if name != "keyboard"], default="bot",
+                        help="input provider of the player")
+    parser.add_argument("--set", type=parse_setting, action="append", default=[], metavar="NAME=VALUES",
+                        help="comma separated values of a config.py setting, can be repeated")
+    parser.add_argument("--workers", type=int, default=None, help="processes, one per core by default")
+    parser.add_argument("--results", default=BATCH_RESULTS_FILE, help="JSON lines file of the games")
+    parser.add_argument("--report", default=BATCH_REPORT_FILE, help="JSON file of the summary")
+    args = parser.parse_args()
+
+    settings = dict(args.set)
+    try:
+        check_settings(settings)
+    except ValueError as error:
+        parser.error(str(error))
+    runs = [(seed, args.inputs, args.frames, overrides) for overrides in get_combinations(settings)
+            for seed in range(args.seed, args.seed+args.games)]
+    print(f"{len(runs)} games")
+    results = []
+    executor = ProcessPoolExecutor(max_workers=args.workers)
+    try:
+        with open(args.results, mode='w') as file:
+            futures = {executor.submit(run_game, *run): run for run in runs}
+            for future in as_completed(futures):
+                seed, inputs, frames, overrides = futures[future]
+                try:
+                    result = future.result()
+                except Exception as error:
+                    result = {"seed": seed, "inputs": inputs, "overrides": overrides, "error": repr(error)}
+                results.append(result)
+                file.write(json.dumps(result) + "\n")
+                file.flush()
+                print(f"[{len(results)}/{len(runs)}] seed {seed} {overrides}: "
+                      + (result["error"] if "error" in result
+                         else f"round {result['rounds']}, score {result['score']}, {result['frames']} frames"))
+    except KeyboardInterrupt:
+        print("interrupted, reporting the finished games")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    report = aggregate(results)
+    with open(args.report, mode='w') as file:
+        json.dump({"inputs": args.inputs, "max_frames": args.frames, "configurations": report}, file, indent=2)
+    for entry in report:
+        print_entry(entry)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
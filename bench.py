@@ -0,0 +1,203 @@
+"""Benchmarks of the game simulation. Fixed, seeded scenarios are run headless
+through World.step(), the results (frames/s, frame time percentiles, peak
+memory) are written as JSON and compared with a stored baseline. With
+--renderer every frame is drawn too, without a display, to measure the
+drawing separately from the simulation.
+Usage: python bench.py [--baseline FILE] [--save-baseline] [--output FILE] [--renderer NAME]
+The exit code is 1 if a scenario got slower or uses more memory than the
+baseline allows, 2 if there is no baseline to compare with."""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from config import *
+from model import random_vector, set_rng
+from objects import AsteroidType, ExplosionAnimation
+from profiler import FrameProfiler
+from renderer import Renderer, NullRenderer, draw_frame
+from raster import FrameBufferRenderer, FrameDumpRenderer
+from world import World
+from inputs import InputProvider, ScriptedInput, AimBot, fire_and_turn
+
+SEED = 20221204
+RENDERERS = {"null": NullRenderer,
+             "framebuffer": FrameBufferRenderer,
+             "dump": lambda: FrameDumpRenderer(FRAME_DUMP_FILE)}
+
+
+class Scenario:
+    """A benchmark run: [setup] prepares the world, [inputs] plays the player"""
+    def __init__(self, name: str, frames: int, setup, inputs: InputProvider | None = None) -> None:
+        self.name = name
+        self.frames = frames
+        self.setup = setup
+        self.inputs = inputs if inputs is not None else InputProvider()
+
+    def create_world(self, profiler: FrameProfiler | None = None, use_arrays: bool = ARRAY_PHYSICS) -> World:
+        world = World(profiler, seed=SEED, use_arrays=use_arrays)
+        set_rng(world.rng)
+        # the player survives every scenario, so they run for all of their frames
+        world.player.set_invincible()
+        world.player.invincible_timer = self.frames+1
+        self.setup(world)
+        return world
+
+
+def start_round(world: World, round_number: int, asteroid_count: int) -> None:
+    '''Starts round [round_number] with [asteroid_count] whole asteroids'''
+    world.levels = round_number
+    world.is_new_wave = False
+    for i in range(asteroid_count):
+        world.add_asteroid(world.asteroid_pool.acquire(world.safe_distance_position(100),
+                                                       ASTEROID_SIZE, AsteroidType.WHOLE))
+
+
+def add_explosions(world: World, count: int, duration: int) -> None:
+    world.is_new_wave = False
+    for i in range(count):
+        world.animations.add(ExplosionAnimation(world.particles, random_vector(0, WIDTH, 0, HEIGHT), duration))
+
+
+def add_pick_ups(world: World, count: int, duration: int) -> None:
+    start_round(world, 1, 1)
+    for i in range(count):
+        pick_up = world.pick_up_pool.acquire(world.safe_distance_position(100), 10)
+        pick_up.duration = duration
+        world.pick_ups.add(pick_up)
+
+
+SCENARIOS = [
+    Scenario("crowded_round", 2000, lambda world: start_round(world, 20, 20)),
+    Scenario("continuous_fire", 3000, lambda world: start_round(world, 8, 8), ScriptedInput(fire_and_turn)),
+    Scenario("mass_explosion", 300, lambda world: add_explosions(world, 100, 300)),
+    Scenario("pick_up_drift", 3000, lambda world: add_pick_ups(world, 150, 3000)),
+    Scenario("bot_play", 3000, lambda world: start_round(world, 10, 10), AimBot()),
+]
+
+
+def run_scenario(scenario: Scenario, use_arrays: bool = ARRAY_PHYSICS, renderer: Renderer | None = None) -> dict:
+    """Runs [scenario] and returns its speed and frame time statistics.
+    Every frame is drawn with [renderer] if it's given."""
+    profiler = FrameProfiler(window=scenario.frames)
+    world = scenario.create_world(profiler, use_arrays)
+    start = time.perf_counter()
+    for frame in range(scenario.frames):
+        profiler.begin_frame()
+        world.step(scenario.inputs.get_input(world))
+        if renderer is not None:
+            draw_frame(renderer, world)
+            profiler.mark("render")
+        profiler.end_frame()
+    elapsed = time.perf_counter()-start
+    return {"frames": scenario.frames,
+            "fps": scenario.frames/elapsed,
+            "frame_ms": profiler.get_frame_percentiles(),
+            "phase_mean_ms": profiler.get_phase_means(),
+            "checksum": world.get_checksum()}
+
+
+def measure_memory(scenario: Scenario, use_arrays: bool = ARRAY_PHYSICS, renderer: Renderer | None = None) -> float:
+    """Runs [scenario] with tracemalloc and returns the peak memory in kB.
+    It's a separate run, because tracemalloc slows the game down a lot."""
+    tracemalloc.start()
+    world = scenario.create_world(use_arrays=use_arrays)
+    for frame in range(scenario.frames):
+        world.step(scenario.inputs.get_input(world))
+        if renderer is not None:
+            draw_frame(renderer, world)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak/1024
+
+
+def run_benchmarks(scenarios: list[Scenario], repeat: int = 1, use_arrays: bool = ARRAY_PHYSICS,
+                   renderer_name: str | None = None) -> dict:
+    """Runs every scenario [repeat] times and keeps the best value of each
+    statistic, the slower runs are mostly disturbed by the rest of the system"""
+    renderer = RENDERERS[renderer_name]() if renderer_name is not None else None
+    results = {}
+    for scenario in scenarios:
+        runs = [run_scenario(scenario, use_arrays, renderer) for i in range(repeat)]
+        result = max(runs, key=lambda run: run["fps"])
+        result["frame_ms"] = {key: min(run["frame_ms"][key] for run in runs) for key in result["frame_ms"]}
+        result["peak_memory_kb"] = measure_memory(scenario, use_arrays, renderer)
+        results[scenario.name] = result
+        print_result(scenario.name, result)
+    if isinstance(renderer, FrameDumpRenderer):
+        renderer.close()
+    return {"python": platform.python_version(),
+            "array_physics": World(use_arrays=use_arrays).uses_arrays,
+            "renderer": renderer_name,
+            "scenarios": results}
+
+
+def print_result(name: str, result: dict) -> None:
+    frame_ms = result["frame_ms"]
+    print(f"{name:<16} {result['fps']:9.0f} frames/s  "
+          f"p50 {frame_ms['p50']:.3f} p95 {frame_ms['p95']:.3f} p99 {frame_ms['p99']:.3f} "
+          f"max {frame_ms['max']:.3f} ms  peak {result['peak_memory_kb']:.0f} kB")
+
+
+def compare(results: dict, baseline: dict, tolerance: float = BENCH_TOLERANCE) -> list[str]:
+    """Returns the regressions of [results] compared to [baseline]. A scenario
+    regresses if its frames/s dropped or its p95 frame time or peak memory grew
+    by more than [tolerance] (a ratio)."""
+    regressions = []
+    if results["array_physics"] != baseline["array_physics"]:
+        print("warning: the baseline was measured with a different physics backend")
+    if results["renderer"] != baseline.get("renderer"):
+        print("warning: the baseline was measured with a different renderer")
+    for name, result in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if result["checksum"] != base["checksum"]:
+            print(f"warning: {name} simulates a different game than the baseline")
+        if result["fps"] < base["fps"]*(1-tolerance):
+            regressions.append(f"{name}: {result['fps']:.0f} frames/s, baseline {base['fps']:.0f}")
+        if result["frame_ms"]["p95"] > base["frame_ms"]["p95"]*(1+tolerance):
+            regressions.append(f"{name}: p95 {result['frame_ms']['p95']:.3f} ms, "
+                               f"baseline {base['frame_ms']['p95']:.3f} ms")
+        if result["peak_memory_kb"] > base["peak_memory_kb"]*(1+tolerance):
+            regressions.append(f"{name}: peak memory {result['peak_memory_kb']:.0f} kB, "
+                               f"baseline {base['peak_memory_kb']:.0f} kB")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the game simulation")
+    parser.add_argument("scenarios", nargs="*", help="names of the scenarios to run, all by default")
+    parser.add_argument("--output", default=BENCH_RESULTS_FILE, help="JSON file of the results")
+    parser.add_argument("--baseline", default=BENCH_BASELINE_FILE, help="JSON file of the baseline results")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario, the fastest one counts")
+    parser.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE, help="allowed slowdown ratio")
+    parser.add_argument("--python-physics", action="store_true", help="don't move the objects with NumPy")
+    parser.add_argument("--renderer", choices=RENDERERS, default=None, help="draw every frame with this renderer")
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenarios or scenario.name in args.scenarios]
+    results = run_benchmarks(scenarios, args.repeat, not args.python_physics, args.renderer)
+    with open(args.output, mode='w') as file:
+        json.dump(results, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, mode='w') as file:
+            json.dump(results, file, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, save one with --save-baseline", file=sys.stderr)
+        return 2
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
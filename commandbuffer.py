@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import tkinter as tk
+
+
+def tcl_quote(value) -> str:
+    """Returns [value] as a single Tcl word"""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (tuple, list)):
+        value = " ".join("{%s}" % element for element in value)
+    value = str(value)
+    for char in '\\"$[]':
+        value = value.replace(char, "\\"+char)
+    return f'"{value}"'
+
+
+def flatten(args) -> list:
+    """Flattens the nested coordinate lists the same way as tkinter does"""
+    flat = []
+    for arg in args:
+        if isinstance(arg, (tuple, list)):
+            flat += flatten(arg)
+        else:
+            flat.append(arg)
+    return flat
+
+
+class FrameCommandBuffer:
+    """Collects the canvas operations of one frame as a Tcl script and sends
+    them to the interpreter with a single call in flush().
+    create() returns its own handles instead of canvas item ids, the real
+    ids are kept in a Tcl array indexed by the handles."""
+    count = 0
+
+    def __init__(self, canvas: tk.Canvas) -> None:
+        self.canvas = canvas
+        self.path = str(canvas)
+        FrameCommandBuffer.count += 1
+        self.array = f"::frame_items{FrameCommandBuffer.count}"
+        self.commands = []
+        self.next_handle = 1
+        self.item_count = 0
+
+    def item(self, tag_or_handle) -> str:
+        if isinstance(tag_or_handle, int):
+            return f"${self.array}({tag_or_handle})"
+        return tcl_quote(tag_or_handle)
+
+    def options(self, options: dict) -> str:
+        return " ".join(f"-{name.rstrip('_')} {tcl_quote(value)}" for name, value in options.items())
+
+    def create(self, item_type: str, args, options: dict) -> int:
+        handle = self.next_handle
+        self.next_handle += 1
+        self.item_count += 1
+        coords = " ".join(tcl_quote(value) for value in flatten(args))
+        self.commands.append(f"set {self.array}({handle}) "
+                             f"[{self.path} create {item_type} {coords} {self.options(options)}]")
+        return handle
+
+    def coords_many(self, items: list[tuple[int, list]]) -> None:
+        '''Sets the coordinates of many (handle, coordinates) pairs
+        with a single Tcl loop'''
+        if not items:
+            return
+        data = " ".join(f"{handle} {{{' '.join(str(value) for value in flatten(coords))}}}"
+                        for handle, coords in items)
+        self.commands.append(f"foreach {{handle coords}} {{{data}}} "
+                             f"{{{self.path} coords ${self.array}($handle) {{*}}$coords}}")
+
+    def itemconfigure(self, handle: int, **options) -> None:
+        self.commands.append(f"{self.path} itemconfigure {self.item(handle)} {self.options(options)}")
+
+    def tag_raise(self, tag_or_handle) -> None:
+        self.commands.append(f"{self.path} raise {self.item(tag_or_handle)}")
+
+    def flush(self) -> None:
+        """Evaluates the collected commands in one call and empties the buffer"""
+        if not self.commands:
+            return
+        script = "\n".join(self.commands)
+        self.commands = []
+        self.canvas.tk.call("eval", script)
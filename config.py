@@ -15,7 +15,12 @@ PLAYER_COLOR = "yellow"
 TEXT_COLOR = "green"
 
 #Game settings:
-REFRESH_RATE = 10       # ms
+REFRESH_RATE = 10       # ms, length of one game frame
+STEP_TIME = REFRESH_RATE/1000   # s
+MAX_FRAME_STEPS = 5     # Max game frames simulated before one render when lagging
+RENDER_INTERPOLATION = False    # Draws the objects between their last two positions
+RENDERER = "canvas"     # canvas: canvas items, raster: software rendered into one image,
+                        # null: nothing is drawn, dump: the frames are saved into FRAME_DUMP_FILE
 RELOAD_RATE = 20         # Frames/reload
 MISSLE_SPEED = 4        # Pixels/frame
 PLAYER_SIZE = 15        # Apprx. size in pixels
@@ -26,6 +31,35 @@ START_LEVEL = 0
 TURNING_RATE = 4        # Degrees/Frame
 ACCELERATION = 0.05     # Pixel/Frame^2
 HEALTH_DROP_FREQ = 15
+PLAYER_INPUT = "keyboard"   # keyboard, bot (aims at the nearest asteroid) or the path of a replay file
+GRID_CELL_SIZE = 40     # Pixels, cell size of the collision grid
+ARRAY_PHYSICS = True    # Moves asteroids, missles and particles with NumPy arrays if NumPy is installed
+PARTICLE_POOL_SIZE = 1024   # Sparks and line segments preallocated for the explosions
+ADAPTIVE_QUALITY = True     # Reduces the sparks and the render rate when the frames take too long
+FRAME_BUDGET = 8        # ms, the adaptive quality keeps the average frame time under it
+QUALITY_WINDOW = 50     # Frames averaged before the quality level changes
+
+#High score settings:
+HIGHSCORE_CACHE_SIZE = 10   # Best entries kept in memory
+HIGHSCORE_COMPACT_SIZE = 500    # Log entries merged into the sorted index at once
+HIGHSCORE_POLL_RATE = 1000  # ms, checking the file for changes on the high score screen
+HIGHSCORE_RESULT_RATE = 50  # ms, checking for finished background writes
+
+#Debug settings:
+PROFILE_WINDOW = 300    # Frames kept for the statistics of the F12 overlay
+PROFILE_EXPORT_FILE = ""    # .json or .csv file to save the frame profile on exit, empty: no export
+REPLAY_DIR = ""         # Folder to save the replay of every game into, empty: no recording
+FRAME_DUMP_FILE = "frames.ppm"  # .ppm: one stream of all frames, .png: a numbered file per frame
+
+#Benchmark settings:
+BENCH_RESULTS_FILE = "bench_results.json"
+BENCH_BASELINE_FILE = "bench_baseline.json"
+BENCH_TOLERANCE = 0.25  # Allowed slowdown (and memory growth) ratio compared to the baseline
+
+#Batch run settings:
+BATCH_MAX_FRAMES = 60000    # Frame limit of a game, 10 minutes of play
+BATCH_RESULTS_FILE = "batch_results.jsonl"
+BATCH_REPORT_FILE = "batch_report.json"
 
 #Other:
 INSTRUCTIONS = ("press <P> to START/PAUSE/UNPAUSE\n"
@@ -0,0 +1,86 @@
+class EntityManager:
+    """Owner of the game objects. Every registered object gets a handle,
+    which stays valid until the object is removed, and the objects of each
+    type are kept in their own view. Removing is deferred: a removed object
+    is skipped by the views at once, but they are compacted only in flush()
+    at the end of the frame, so objects can be removed while iterating."""
+    def __init__(self) -> None:
+        self.objects = {}       # handle -> object
+        self.views = []
+        self.next_handle = 1
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def create_view(self) -> "EntityView":
+        view = EntityView(self)
+        self.views.append(view)
+        return view
+
+    def register(self, obj) -> int:
+        '''Gives a new handle to [obj]'''
+        if obj.handle is not None:
+            raise ValueError(f"{obj} is already registered")
+        obj.handle = self.next_handle
+        self.next_handle += 1
+        self.objects[obj.handle] = obj
+        return obj.handle
+
+    def unregister(self, obj) -> None:
+        del self.objects[obj.handle]
+        obj.handle = None
+
+    def get(self, handle: int):
+        """Returns the object of [handle], None if it was removed"""
+        return self.objects.get(handle)
+
+    def flush(self) -> list:
+        """Compacts the views and returns the objects removed since the last flush.
+        They may only be added again after this."""
+        removed = []
+        for view in self.views:
+            removed += view.compact()
+        return removed
+
+
+class EntityView:
+    """The objects of one type, in the order they were added. Iterating
+    visits the objects added during the iteration too, and skips the
+    removed ones."""
+    def __init__(self, manager: EntityManager) -> None:
+        self.manager = manager
+        self.items = []
+        self.removed = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        for obj in self.items:
+            if obj.handle is not None:
+                yield obj
+
+    def add(self, obj) -> int:
+        '''Registers [obj] and adds it to the end of the view, returns its handle'''
+        handle = self.manager.register(obj)
+        self.items.append(obj)
+        self.count += 1
+        return handle
+
+    def remove(self, obj) -> None:
+        '''Removes [obj] in O(1), its place is freed by compact()'''
+        if obj.handle is None:
+            return
+        self.manager.unregister(obj)
+        self.removed.append(obj)
+        self.count -= 1
+
+    def compact(self) -> list:
+        """Drops the removed objects keeping the order of the others,
+        returns the removed ones"""
+        removed = self.removed
+        if removed:
+            self.items = [obj for obj in self.items if obj.handle is not None]
+            self.removed = []
+        return removed
@@ -1,23 +1,310 @@
+import atexit
+import bisect
+import heapq
+import os
+import queue
+import struct
+import threading
+from config import *
+
+HEADER = struct.Struct("<4sQQ")     # magic, next sequence number, merged log size
+RECORD = struct.Struct("<qQ16s")    # score, sequence number, name
+MAGIC = b"HSX1"
+
+
+def parse_line(line: str) -> tuple[str, int] | None:
+    """Returns the (name, score) pair of a log line, None if it's malformed"""
+    parts = line.rsplit(None, 1)
+    if len(parts) != 2:
+        return None
+    try:
+        return parts[0], int(parts[1])
+    except ValueError:
+        return None
+
+
 class HighScoreTable:
-    def __init__(self, filename: str) -> None:
+    """High score table. New entries are appended to a text log
+    ('name score' lines), which is merged into a binary index sorted by
+    score when it reaches [compact_size] entries. The top scores are read
+    from the head of the index, the rank of a score is found with a binary
+    search on it. The best [cache_size] entries are kept in memory, the files
+    are only read again when someone else changed them."""
+    def __init__(self, filename: str, cache_size: int = HIGHSCORE_CACHE_SIZE,
+                 compact_size: int = HIGHSCORE_COMPACT_SIZE) -> None:
         self.filename = filename+".hs"
+        self.index_filename = filename+".hsx"
+        self.cache_size = cache_size
+        self.compact_size = compact_size
+        self.cache = []         # (-score, sequence number, name) tuples, best first
+        self.log = []           # entries of the log, sorted the same way
+        self.index_count = 0
+        self.next_sequence = 0
+        self.merged_log_size = 0
+        self.file_state = None
+        self.is_loaded = False
+        self.pending = 0
+        self.results = queue.Queue()
 
-    def write_entry(self, player_name: str, score: int) -> None:
-        "Write a new wntry (name/score pair) at the end of the file"
+    def get_file_state(self) -> tuple:
+        state = []
+        for filename in (self.filename, self.index_filename):
+            try:
+                stat = os.stat(filename)
+                state.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
+
+    def read_header(self) -> tuple[int, int, int]:
+        '''Returns the record count, the next sequence number and the merged
+        log size of the index'''
+        try:
+            with open(self.index_filename, mode='rb') as file:
+                magic, next_sequence, merged_log_size = HEADER.unpack(file.read(HEADER.size))
+                if magic != MAGIC:
+                    raise ValueError(f"{self.index_filename} is not a high score index")
+                index_count = (os.fstat(file.fileno()).st_size - HEADER.size) // RECORD.size
+        except FileNotFoundError:
+            return 0, 0, 0
+        return index_count, next_sequence, merged_log_size
+
+    def read_index(self, start: int, count: int, index_count: int | None = None) -> list[tuple[int, int, str]]:
+        '''Returns [count] entries of the index from position [start]'''
+        if index_count is None:
+            index_count = self.index_count
+        count = min(count, index_count-start)
+        if count <= 0:
+            return []
+        with open(self.index_filename, mode='rb') as file:
+            file.seek(HEADER.size + start*RECORD.size)
+            data = file.read(count*RECORD.size)
+        return [(-score, sequence, name.rstrip(b"\0").decode(errors='ignore'))
+                for score, sequence, name in RECORD.iter_unpack(data)]
+
+    def iter_index(self, index_count: int, chunk: int = 1024):
+        for start in range(0, index_count, chunk):
+            yield from self.read_index(start, chunk, index_count)
+
+    def read_log(self, log_size: int | None, merged_log_size: int,
+                 next_sequence: int) -> tuple[list[tuple[int, int, str]], int]:
+        '''Returns the sorted, not yet merged entries of the log
+        and the next free sequence number'''
+        log = []
+        if log_size is None:
+            return log, next_sequence
+        # if the log is shorter than the merged size, it was already
+        # emptied after the last compaction
+        offset = merged_log_size if log_size >= merged_log_size else 0
+        with open(self.filename, mode='rb') as file:
+            file.seek(offset)
+            for line in file:
+                entry = parse_line(line.decode(errors='ignore'))
+                if entry is not None:
+                    log.append((-entry[1], next_sequence, entry[0]))
+                    next_sequence += 1
+        log.sort()
+        return log, next_sequence
+
+    def load(self) -> None:
+        '''Reads the index header, the unmerged part of the log
+        and the best entries'''
+        self.file_state = self.get_file_state()
+        self.index_count, next_sequence, self.merged_log_size = self.read_header()
+        log_size = self.file_state[0] and self.file_state[0][1]
+        self.log, self.next_sequence = self.read_log(log_size, self.merged_log_size, next_sequence)
+        self.cache = list(heapq.merge(self.read_index(0, self.cache_size),
+                                      self.log[:self.cache_size]))[:self.cache_size]
+        self.is_loaded = True
+
+    def is_cache_valid(self) -> bool:
+        # while the background writer works on the files, the memory is up to date
+        if self.pending:
+            return self.is_loaded
+        return self.is_loaded and self.get_file_state() == self.file_state
+
+    def add_entry(self, player_name: str, score: int) -> None:
+        '''Adds a new entry to the table in the memory only'''
+        entry = (-score, self.next_sequence, player_name)
+        self.next_sequence += 1
+        bisect.insort(self.log, entry)
+        if len(self.cache) < self.cache_size or entry < self.cache[-1]:
+            bisect.insort(self.cache, entry)
+            del self.cache[self.cache_size:]
+
+    def append_to_log(self, entries: list[tuple[str, int]], sync: bool = False) -> None:
+        '''Appends (name, score) pairs to the log file, with [sync] they are
+        flushed to the disk too'''
         with open(self.filename, mode='a') as file:
-            file.write(f"{player_name} {score}\n")
+            for player_name, score in entries:
+                file.write(f"{player_name} {score}\n")
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+
+    def write_entry(self, player_name: str, score: int) -> None:
+        """Writes a new entry (name/score pair) through the background writer
+        and waits until it's on the disk, so it can't race the queued jobs"""
+        errors = []
+        self.submit_entry(player_name, score, errors.append)
+        self.wait_results()
+        if errors[0] is not None:
+            raise errors[0]
+
+    def submit_entry(self, player_name: str, score: int, on_saved=None) -> None:
+        """Adds a new entry to the table immediately and lets the background
+        writer save it. [on_saved] is called with the error (or None) from
+        process_results(), when the entry is on the disk."""
+        if not self.is_cache_valid():
+            self.load()
+        self.add_entry(player_name, score)
+        self.pending += 1
+        writer = get_writer()
+        writer.put(self, "append", (player_name, score), on_saved)
+        if len(self.log) >= self.compact_size:
+            self.pending += 1
+            writer.put(self, "compact")
+
+    def process_results(self) -> bool:
+        """Calls the callbacks of the finished background writes, it has to be
+        called from the thread of the game (e.g. from a Tk after() callback).
+        Returns True while there are still pending writes."""
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.finish_result(*result)
+        return self.pending > 0
+
+    def wait_results(self) -> None:
+        """Same as process_results(), but blocks until every pending write is done"""
+        while self.pending:
+            self.finish_result(*self.results.get())
+
+    def finish_result(self, on_saved, error: OSError | None) -> None:
+        self.pending -= 1
+        if self.pending == 0:
+            self.load()
+        if on_saved is not None:
+            on_saved(error)
+
+    def compact_files(self) -> None:
+        """Merges the log file into the index file and empties the log. It only
+        works on the files, so the background writer can run it as well.
+        The new index replaces the old one in one step, its header remembers the
+        merged log size, so entries are not merged twice if the log couldn't be emptied."""
+        log_state = self.get_file_state()[0]
+        log_size = log_state[1] if log_state else 0
+        index_count, next_sequence, merged_log_size = self.read_header()
+        log, next_sequence = self.read_log(log_state and log_size, merged_log_size, next_sequence)
+        temp_filename = self.index_filename+".tmp"
+        with open(temp_filename, mode='wb') as file:
+            file.write(HEADER.pack(MAGIC, next_sequence, log_size))
+            for negative_score, sequence, name in heapq.merge(self.iter_index(index_count), log):
+                file.write(RECORD.pack(-negative_score, sequence, name.encode()[:16]))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self.index_filename)
+        open(self.filename, mode='w').close()
+        with open(self.index_filename, mode='r+b') as file:
+            file.write(HEADER.pack(MAGIC, next_sequence, 0))
+
+    def rank(self, score: int) -> int:
+        """Returns the place a new entry with [score] would get in the table (1 is the best)"""
+        if not self.is_cache_valid():
+            self.load()
+        return 1 + self.count_index_at_least(score) + bisect.bisect_right(self.log, (-score, float('inf')))
+
+    def count_index_at_least(self, score: int) -> int:
+        '''Returns the number of index entries with at least [score],
+        with a binary search on the records of the file'''
+        if self.index_count == 0:
+            return 0
+        low, high = 0, self.index_count
+        with open(self.index_filename, mode='rb') as file:
+            while low < high:
+                middle = (low+high) // 2
+                file.seek(HEADER.size + middle*RECORD.size)
+                if RECORD.unpack(file.read(RECORD.size))[0] >= score:
+                    low = middle+1
+                else:
+                    high = middle
+        return low
 
     def print_table(self) -> None:
-        with open(self.filename, mode='r') as file:
-            for line in file:
-                print(line.strip())
+        if not self.is_cache_valid():
+            self.load()
+        for negative_score, sequence, name in heapq.merge(self.iter_index(self.index_count), self.log):
+            print(name, -negative_score)
 
     def top_scores(self, top: int = 3):
         """Returns a list (best 3 by default)
         of tuples of top player/score pairs"""
-        with open(self.filename, mode='r') as file:
-            scores = [tuple(line.strip().split()) for line in file]
-            scores.sort(reverse=True, key=lambda x: int(x[1]))
-            for score in scores[:top]:
-                yield f"{score[0]}\t{score[1]}"
+        if top > self.cache_size:
+            self.cache_size = top
+            self.is_loaded = False
+        if not self.is_cache_valid():
+            self.load()
+        for negative_score, sequence, name in self.cache[:top]:
+            yield f"{name}\t{-negative_score}"
+
+
+class HighScoreWriter(threading.Thread):
+    """Background thread saving high score entries, so the disk I/O doesn't
+    block the game. The jobs waiting in the queue are done together, with one
+    fsync per file, the results are sent back to the table's result queue."""
+    def __init__(self) -> None:
+        super().__init__(name="HighScoreWriter", daemon=True)
+        self.jobs = queue.Queue()
+
+    def put(self, table: HighScoreTable, job: str, entry: tuple[str, int] | None = None, on_saved=None) -> None:
+        self.jobs.put((table, job, entry, on_saved))
+
+    def run(self) -> None:
+        is_closed = False
+        while not is_closed:
+            jobs = [self.jobs.get()]
+            while True:
+                try:
+                    jobs.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            is_closed = None in jobs
+            self.process([job for job in jobs if job is not None])
+
+    def process(self, jobs: list) -> None:
+        tables = {}
+        for job in jobs:
+            tables.setdefault(job[0], []).append(job)
+        for table, table_jobs in tables.items():
+            error = None
+            try:
+                entries = [entry for _, job, entry, _ in table_jobs if job == "append"]
+                if entries:
+                    table.append_to_log(entries, sync=True)
+                if any(job == "compact" for _, job, _, _ in table_jobs):
+                    table.compact_files()
+            except OSError as exception:
+                error = exception
+            for _, job, _, on_saved in table_jobs:
+                table.results.put((on_saved, error))
+
+    def close(self) -> None:
+        """Finishes the queued jobs and stops the thread"""
+        self.jobs.put(None)
+        self.join()
+
+
+writer = None
+
 
+def get_writer() -> HighScoreWriter:
+    """Returns the background writer, starts it on the first call"""
+    global writer
+    if writer is None:
+        writer = HighScoreWriter()
+        writer.start()
+        # the queued entries are saved before the program exits
+        atexit.register(writer.close)
+    return writer
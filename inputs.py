@@ -0,0 +1,127 @@
+"""Sources of the player's controls. The game polls its input provider once
+per frame, before stepping the world, so the same game can be played from
+the keyboard, replayed from a file or played by a bot without a window."""
+import math
+from config import *
+from model import Vector2D
+from profiler import FrameProfiler
+from replay import Replay
+from world import World, PlayerInput
+
+
+class InputProvider:
+    """Base class of the input sources, returns no input"""
+    def create_world(self, profiler: FrameProfiler | None = None) -> World:
+        """Returns the world of a new game played with this input"""
+        return World(profiler)
+
+    def set_key(self, keysym: str, is_pressed: bool) -> None:
+        """Called with the key events of the game screen, only the keyboard uses them"""
+        pass
+
+    def get_input(self, world: World) -> PlayerInput:
+        '''Returns the controls of the next step of [world]'''
+        return PlayerInput()
+
+
+class KeyboardInput(InputProvider):
+    """State of the keys, updated by the key events of the game screen"""
+    def __init__(self) -> None:
+        self.is_accelerating = False
+        self.is_turning_left = False
+        self.is_turning_right = False
+        self.is_shooting = False
+
+    def set_key(self, keysym: str, is_pressed: bool) -> None:
+        match keysym:
+            case 'w'|'Up':
+                self.is_accelerating = is_pressed
+            case 'a'|'Left':
+                self.is_turning_left = is_pressed
+            case 'd'|'Right':
+                self.is_turning_right = is_pressed
+            case 'space':
+                self.is_shooting = is_pressed
+
+    def get_input(self, world: World) -> PlayerInput:
+        return PlayerInput(self.is_accelerating, self.is_turning_left,
+                           self.is_turning_right, self.is_shooting)
+
+
+class ReplayInput(InputProvider):
+    """Plays the inputs of a recorded game, the world is created with its seed"""
+    def __init__(self, replay: Replay) -> None:
+        self.replay = replay
+
+    def create_world(self, profiler: FrameProfiler | None = None) -> World:
+        return self.replay.create_world(profiler)
+
+    def get_input(self, world: World) -> PlayerInput:
+        if world.frames >= len(self.replay.inputs):
+            return PlayerInput()
+        return self.replay.get_input(world.frames)
+
+
+class ScriptedInput(InputProvider):
+    """Inputs computed from the frame number by [script]"""
+    def __init__(self, script) -> None:
+        self.script = script
+
+    def get_input(self, world: World) -> PlayerInput:
+        return self.script(world.frames)
+
+
+class AimBot(InputProvider):
+    """Reference bot: turns towards the nearest asteroid, where it will be when
+    a missle reaches it, and shoots whenever the player can. It doesn't shoot
+    without asteroids, the next round only starts when the missles are gone."""
+    def get_input(self, world: World) -> PlayerInput:
+        player = world.player
+        target = self.get_nearest_asteroid(world)
+        if target is None:
+            return PlayerInput()
+        dx, dy = self.get_wrapped_offset(player.center, target.center)
+        # leads the target by the flight time of the missle
+        flight_time = math.hypot(dx, dy)/MISSLE_SPEED
+        dx += (target.speed.x-player.speed.x)*flight_time
+        dy += (target.speed.y-player.speed.y)*flight_time
+        # heading 0 points up, the headings grow counterclockwise
+        target_heading = math.degrees(math.atan2(-dx, -dy))
+        difference = (target_heading-player.heading+180) % 360 - 180
+        return PlayerInput(is_turning_left=difference > TURNING_RATE/2,
+                           is_turning_right=difference < -TURNING_RATE/2,
+                           is_shooting=player.can_shoot())
+
+    def get_nearest_asteroid(self, world: World):
+        center = world.player.center
+        return min(world.asteroids, default=None,
+                   key=lambda asteroid: center.wrapped_distance_sq(asteroid.center, WIDTH, HEIGHT))
+
+    def get_wrapped_offset(self, start: Vector2D, end: Vector2D) -> tuple[float, float]:
+        '''Returns the shortest offset from [start] to [end] across the window edges'''
+        dx = (end.x-start.x+WIDTH/2) % WIDTH - WIDTH/2
+        dy = (end.y-start.y+HEIGHT/2) % HEIGHT - HEIGHT/2
+        return dx, dy
+
+
+def idle(frame: int) -> PlayerInput:
+    return PlayerInput()
+
+
+def fire_and_turn(frame: int) -> PlayerInput:
+    # the missles are shot at every RELOAD_RATE frame, in a slowly turning direction
+    return PlayerInput(is_turning_left=frame % 3 == 0, is_shooting=True)
+
+
+PROVIDERS = {"keyboard": KeyboardInput,
+             "idle": lambda: ScriptedInput(idle),
+             "fire_and_turn": lambda: ScriptedInput(fire_and_turn),
+             "bot": AimBot}
+
+
+def make_input_provider(name: str) -> InputProvider:
+    """Returns the provider of [name]: keyboard, bot, idle, fire_and_turn
+    or the path of a replay file"""
+    if name in PROVIDERS:
+        return PROVIDERS[name]()
+    return ReplayInput(Replay.load(name))
@@ -1,6 +1,9 @@
 import tkinter as tk
 from config import *
 from screens import *
+from profiler import FrameProfiler
+from renderer import Renderer, NullRenderer, CanvasRenderer
+from raster import RasterRenderer, FrameDumpRenderer
 
 class Window(tk.Tk):
     def __init__(self):
@@ -15,9 +18,29 @@ class Window(tk.Tk):
         self.resizable(False, False)
         self.canvas = tk.Canvas(self, bg=BG, height=HEIGHT, width=WIDTH)
         self.canvas.pack()
+        self.profiler = FrameProfiler()
+        self.renderer = self.create_renderer()
         self.start_screen = StartScreen(self)
         self.start_screen.loop()
 
+    def create_renderer(self) -> Renderer:
+        match RENDERER:
+            case "raster":
+                return RasterRenderer(self.canvas)
+            case "null":
+                return NullRenderer()
+            case "dump":
+                return FrameDumpRenderer(FRAME_DUMP_FILE)
+            case _:
+                return CanvasRenderer(self.canvas)
+
+    def destroy(self):
+        if PROFILE_EXPORT_FILE:
+            self.profiler.export(PROFILE_EXPORT_FILE)
+        if isinstance(self.renderer, FrameDumpRenderer):
+            self.renderer.close()
+        super().destroy()
+
 
 if __name__ == "__main__":
     app = Window()
@@ -1,10 +1,18 @@
 import math
 import random
+from array import array
+
+# sine and cosine of every integer degree, the headings of the objects are integers
+SIN_TABLE = [math.sin(math.radians(degree)) for degree in range(360)]
+COS_TABLE = [math.cos(math.radians(degree)) for degree in range(360)]
 
 
 class Vector2D:
     """2 dimesional Vector object to represent position but also speed and acceleration
-    as well"""
+    as well. The operators return new vectors, the in-place methods (+=,
+    rotate_into) don't allocate, they are for the frame loop."""
+    __slots__ = ("x", "y")
+
     def __init__(self, x: int, y: int):
         self.x = x
         self.y = y
@@ -16,6 +24,11 @@ class Vector2D:
         return Vector2D(self.x + other.x,
                       self.y + other.y)
 
+    def __iadd__(self, other: "Vector2D") -> "Vector2D":
+        self.x += other.x
+        self.y += other.y
+        return self
+
     def __sub__(self, other: "Vector2D") -> "Vector2D":
         return Vector2D(self.x-other.x, self.y-other.y)
 
@@ -26,17 +39,49 @@ class Vector2D:
         return self.x == other.x and self.y == other.y
 
     def rotate(self, degree: int,  axis_point: "Vector2D") -> "Vector2D":
-        '''Rotates the vector around the [axis_point] with the given [degree]'''
-        radians = math.radians(degree)
+        '''Rotates the vector around the [axis_point] with the given integer [degree]'''
+        sin = SIN_TABLE[degree % 360]
+        cos = COS_TABLE[degree % 360]
         x = self.x - axis_point.x
         y = self.y - axis_point.y
-        new_x = x*math.cos(radians) + y*math.sin(radians) + axis_point.x
-        new_y = -x*math.sin(radians) + y*math.cos(radians) + axis_point.y
+        new_x = x*cos + y*sin + axis_point.x
+        new_y = -x*sin + y*cos + axis_point.y
         return Vector2D(new_x, new_y)
 
+    def rotate_into(self, degree: int, axis_point: "Vector2D", result: "Vector2D") -> "Vector2D":
+        '''Same as rotate(), but writes the rotated vector into [result]'''
+        sin = SIN_TABLE[degree % 360]
+        cos = COS_TABLE[degree % 360]
+        x = self.x - axis_point.x
+        y = self.y - axis_point.y
+        result.x = x*cos + y*sin + axis_point.x
+        result.y = -x*sin + y*cos + axis_point.y
+        return result
+
+    def copy(self) -> "Vector2D":
+        return Vector2D(self.x, self.y)
+
     def distance(self, other: "Vector2D") -> float:
         '''Returns the distance between two vectors'''
-        return abs(self - other)
+        return math.sqrt(self.distance_sq(other))
+
+    def distance_sq(self, other: "Vector2D") -> float:
+        '''Returns the squared distance, for comparing it with a squared threshold'''
+        dx = self.x - other.x
+        dy = self.y - other.y
+        return dx*dx + dy*dy
+
+    def wrapped_distance(self, other: "Vector2D", width: int, height: int) -> float:
+        '''Returns the distance between two vectors on a [width]x[height] field
+        where the opposite edges are connected'''
+        return math.sqrt(self.wrapped_distance_sq(other, width, height))
+
+    def wrapped_distance_sq(self, other: "Vector2D", width: int, height: int) -> float:
+        dx = abs(self.x - other.x) % width
+        dy = abs(self.y - other.y) % height
+        dx = min(dx, width-dx)
+        dy = min(dy, height-dy)
+        return dx*dx + dy*dy
 
     @classmethod
     def zero_vector(cls) -> "Vector2D":
@@ -48,21 +93,74 @@ class Vector2D:
                         (start_point.y+end_point.y)/2)
 
 
+class RotatedShape:
+    """Vertex offsets of a shape rotated to every integer heading. A heading is
+    rotated when it's first used, after that it's only looked up. The offsets
+    are stored as flat x, y arrays, a spinning asteroid can use all the 360."""
+    shared = {}
+
+    def __init__(self, shape: list[Vector2D]) -> None:
+        self.set_shape(shape)
+
+    def set_shape(self, shape: list[Vector2D]) -> None:
+        self.shape = [(point.x, point.y) for point in shape]
+        self.rotations = [None]*360
+
+    def get(self, heading: int) -> array:
+        '''Returns the x, y offsets of the vertices at [heading] in one array'''
+        index = heading % 360
+        rotated = self.rotations[index]
+        if rotated is None:
+            sin, cos = SIN_TABLE[index], COS_TABLE[index]
+            rotated = array('d', [value for x, y in self.shape for value in (x*cos + y*sin, -x*sin + y*cos)])
+            self.rotations[index] = rotated
+        return rotated
+
+    def place(self, heading: int, center: Vector2D, points: list[Vector2D]) -> None:
+        '''Moves [points] to the vertices at [heading] around [center].
+        The points are created on the first call, later they are updated in place.'''
+        if len(points) != len(self.shape):
+            points[:] = [Vector2D(0, 0) for point in self.shape]
+        offsets = iter(self.get(heading))
+        x, y = center.x, center.y
+        for point, dx, dy in zip(points, offsets, offsets):
+            point.x = x + dx
+            point.y = y + dy
+
+    @classmethod
+    def get_shared(cls, shape: list[Vector2D]) -> "RotatedShape":
+        """Returns the cache of [shape] shared by every object with the same shape"""
+        key = tuple((point.x, point.y) for point in shape)
+        if key not in cls.shared:
+            cls.shared[key] = RotatedShape(shape)
+        return cls.shared[key]
+
+
+rng = random.Random()
+
+
+def set_rng(new_rng: random.Random) -> None:
+    """Sets the random generator of the functions below. Every game uses its
+    own seeded generator, so a game can be reproduced from its seed."""
+    global rng
+    rng = new_rng
+
+
 def random_vector(min_x: int, max_x: int, min_y: int, max_y: int) -> Vector2D:
-    x = random.randint(min_x, max_x)
-    y = random.randint(min_y, max_y)
+    x = rng.randint(min_x, max_x)
+    y = rng.randint(min_y, max_y)
     return Vector2D(x, y)
 
 
 def random_num(range_num: int) -> int:
     """Returns a random int between +/-[range_num]"""
-    return random.randint(-range_num, range_num)
+    return rng.randint(-range_num, range_num)
 
 
 def random_bool(chance: int) -> bool:
     """Returns True in 1 in [chance] occasions.
     For e.g. [chance] = 20: returns True with 1/20 (5%) chance,
     else  returns False"""
-    return random.randint(1, chance) == 1
+    return rng.randint(1, chance) == 1
     
 
@@ -1,7 +1,26 @@
-import tkinter as tk
-from model import Vector2D, random_num, random_vector
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from model import Vector2D, RotatedShape, random_num
 from enum import Enum
 from config import*
+if TYPE_CHECKING:
+    # the renderer is only needed for drawing, the objects can be simulated without it
+    from renderer import Renderer
+    from particles import ParticleSystem
+    from pool import ObjectPool
+
+
+def to_canvas_coords(points: list[Vector2D], is_closed: bool = False,
+                     offset: tuple[float, float] = (0, 0)) -> list[int]:
+    """Returns the flat, int converted coordinate list of [points] moved by [offset]
+    for the renderer. A closed outline ends with its first point again."""
+    if is_closed:
+        points = points + points[:1]
+    dx, dy = offset
+    return [int(value) for point in points for value in (point.x+dx, point.y+dy)]
+
+
+ORIGIN = Vector2D(0, 0)
 
 
 class AsteroidType(Enum):
@@ -13,42 +32,69 @@ class AsteroidType(Enum):
 class SpaceObject:
     '''Base class for all space objects'''
     def __init__(self, position: Vector2D, size: int) -> None:
-        self.size = size
-        self.center = position
         self.shape = []
         self.border_points = []
+        self.body = None
+        self.handle = None
+        self.rotated_shape = None
+        self.init_object(position, size)
+
+    def init_object(self, position: Vector2D, size: int) -> None:
+        '''Sets the state of a new object. The pooled objects call it again
+        when they are reused.'''
+        self.size = size
+        # copied, the centers are moved in place and [position] can be the
+        # center of another object (e.g. the parent asteroid)
+        self.center = position.copy()
+        self.shape.clear()
         self.speed = Vector2D.zero_vector()
         self.heading = 0
         self.init_shape()
+        self.init_rotated_shape()
+        self.bounding_radius = max((abs(point) for point in self.shape), default=0)
+        # the shape doesn't change later, the collision checks use the cached radius
+        self.collision_radius = self.get_collision_radius()
+        self.collision_radius_sq = self.collision_radius**2
         self.update_border_points()
         self.is_to_dispose = False
         self.color = DRAW_COLOR
+        self.is_wrapping = True
+        self.spin_speed = 0
     
     def __str__(self) -> str:
         return f"{type(self)} x={self.center.x}, y={self.center.y}"
     
     def init_shape(self) -> None:
         pass
+
+    def init_rotated_shape(self) -> None:
+        self.rotated_shape = RotatedShape.get_shared(self.shape)
+
+    def get_collision_radius(self) -> float:
+        return self.bounding_radius
     
     def update_border_points(self) -> None:
-        self.border_points = []
-        for point in self.shape:
-            self.border_points.append((self.center + point).rotate(self.heading, self.center))
+        '''Moves the cached, rotated shape of the heading to the center'''
+        self.rotated_shape.place(self.heading, self.center, self.border_points)
 
-    def update(self) -> None:
+    def move(self) -> None:
+        '''Moves the object with its speed (wrapping around the window edges)
+        and updates its border points'''
         self.center += self.speed
         self.center.x = self.center.x % WIDTH
         self.center.y = self.center.y % HEIGHT
         self.update_border_points()
+
+    def update(self) -> None:
+        # objects stored in a physics.BodyStore are moved by the store
+        if self.body is None:
+            self.move()
         self.is_to_dispose = self.is_disposable()
 
-    def draw(self, canvas: tk.Canvas) -> None:
-        
-        points =  self.border_points+self.border_points[:1]
-        for i in range(len(points)-1):
-            x1, y1, x2, y2 = int(points[i].x), int(points[i].y), int(points[i+1].x), int(points[i+1].y)
-            canvas.create_line(x1, y1, x2, y2, width=1, fill=self.color)
-            
+    def draw(self, renderer: Renderer, offset: tuple[float, float] = (0, 0)) -> None:
+        '''Draws the outline as one closed line'''
+        renderer.polyline(to_canvas_coords(self.border_points, True, offset), self.color)
+
     def rotate(self, degree) -> None:
         self.heading += degree
 
@@ -60,6 +106,9 @@ class Player(SpaceObject):
     '''Spaceship of the player'''
     def __init__(self, position: Vector2D, size: int):
         self.exhaust_shape = []
+        self.exhaust_points = []
+        self.thrust = Vector2D(0, -ACCELERATION)
+        self.acceleration = Vector2D.zero_vector()
         super().__init__(position, size)
         self.reload_timer = RELOAD_RATE
         self.invincible_timer = 40
@@ -85,39 +134,25 @@ class Player(SpaceObject):
         self.exhaust_shape.append(E)
         self.exhaust_shape.append(F)
     
+    def init_rotated_shape(self) -> None:
+        self.rotated_exhaust = RotatedShape.get_shared(self.exhaust_shape)
+        super().init_rotated_shape()
+
     def update_border_points(self):
-        self.exhaust_points = []
-        for point in self.exhaust_shape:
-            self.exhaust_points.append((self.center + point).rotate(self.heading, self.center))
+        self.rotated_exhaust.place(self.heading, self.center, self.exhaust_points)
         return super().update_border_points()
 
-    def draw_exhaust(self, canvas: tk.Canvas) -> None:
-        canvas.create_line(self.exhaust_points[0].x, 
-            self.exhaust_points[0].y, 
-            self.exhaust_points[1].x, 
-            self.exhaust_points[1].y, 
-            width=2, fill=DRAW_COLOR)
-        canvas.create_line(self.exhaust_points[1].x, 
-            self.exhaust_points[1].y, 
-            self.exhaust_points[2].x, 
-            self.exhaust_points[2].y, 
-            width=2, fill=DRAW_COLOR)
-
-    def draw(self, canvas: tk.Canvas):
+    def draw(self, renderer: Renderer, offset: tuple[float, float] = (0, 0)):
         if self.is_destroyed:
             return
         if self.is_accelerating:
-            self.draw_exhaust(canvas)
-            self.is_accelerating = False
-        if self.is_invincible:
-            #blinking when its invincible
-            if (self.animation_timer//2) % 4 == 0:
-                super().draw(canvas)
-        else:
-            super().draw(canvas)
+            renderer.polyline(to_canvas_coords(self.exhaust_points, False, offset), DRAW_COLOR, width=2)
+        #blinking when its invincible
+        if not self.is_invincible or (self.animation_timer//2) % 4 == 0:
+            super().draw(renderer, offset)
 
     def update_acceleration(self) -> None:
-        self.acceleration = Vector2D(0, -ACCELERATION).rotate(self.heading, Vector2D.zero_vector())
+        self.thrust.rotate_into(self.heading, ORIGIN, self.acceleration)
 
     def accelerate(self) -> None:
         self.update_acceleration()
@@ -139,9 +174,10 @@ class Player(SpaceObject):
             return False
         return self.reload_timer < 0
 
-    def shoot(self) -> "Missle":
+    def shoot(self, missles: ObjectPool) -> "Missle":
+        '''Returns a new missle from the [missles] pool'''
         self.reload_timer = RELOAD_RATE
-        return Missle(self.center, self.heading, self.speed, self.size//3)
+        return missles.acquire(self.center, self.heading, self.speed, self.size//3)
 
     def is_disposable(self):
 
@@ -157,7 +193,15 @@ class Missle(SpaceObject):
     def __init__(self, position: Vector2D, heading: int, initial_speed: Vector2D, size: int):
 
         super().__init__(position, size)
+        self.init_missle(heading, initial_speed)
+
+    def reset(self, position: Vector2D, heading: int, initial_speed: Vector2D, size: int) -> None:
+        self.init_object(position, size)
+        self.init_missle(heading, initial_speed)
+
+    def init_missle(self, heading: int, initial_speed: Vector2D) -> None:
         self.heading = heading
+        self.is_wrapping = False
         self.speed = Vector2D(0, -MISSLE_SPEED).rotate(self.heading, Vector2D.zero_vector()) + initial_speed
 
     def init_shape(self) -> None:
@@ -168,11 +212,9 @@ class Missle(SpaceObject):
         self.shape.append(A)
         self.shape.append(B)
 
-    def update(self):
-        
-         self.center += self.speed
-         self.update_border_points()
-         self.is_to_dispose = self.is_disposable()
+    def move(self) -> None:
+        self.center += self.speed
+        self.update_border_points()
 
     def is_outside_window(self):
 
@@ -192,6 +234,14 @@ class Asteroid(SpaceObject):
     def __init__(self, position: Vector2D, size: int, type: AsteroidType) -> None:
         self.type = type
         super().__init__(position, size)
+        self.init_asteroid()
+
+    def reset(self, position: Vector2D, size: int, type: AsteroidType) -> None:
+        self.type = type
+        self.init_object(position, size)
+        self.init_asteroid()
+
+    def init_asteroid(self) -> None:
         self.spin_speed = random_num(3)
         self.destroyed = False
         match self.type:
@@ -211,46 +261,60 @@ class Asteroid(SpaceObject):
         self.shape.append( Vector2D(-self.size//3 + random_num(self.size//4), self.size//3 + random_num(self.size//4)) ) #F
         self.shape.append( Vector2D(-self.size//2 + random_num(self.size//4), 0 ) ) #G
         self.shape.append( Vector2D(-self.size//3 + random_num(self.size//4), -self.size//3 + random_num(self.size//4)) ) #H        
+
+    def init_rotated_shape(self) -> None:
+        # every asteroid has its own random shape, the cache isn't shared
+        if self.rotated_shape is None:
+            self.rotated_shape = RotatedShape(self.shape)
+        else:
+            self.rotated_shape.set_shape(self.shape)
     
     def spin(self) -> None:
         self.heading += self.spin_speed
 
-    def update(self) -> None:
+    def move(self) -> None:
         self.spin()
-        return super().update()
+        return super().move()
 
     def get_avg_diameter(self) -> float:
         '''Returns the average diameter of the asteroid for 
         collision checking operations'''
-        distances_from_center = [Vector2D(0,0).distance(point) for point in self.shape]
-        return sum(distances_from_center) / len(distances_from_center)
+        return sum(abs(point) for point in self.shape) / len(self.shape)
+
+    def get_collision_radius(self) -> float:
+        return self.get_avg_diameter()
 
     def is_point_inside(self, point: Vector2D) -> bool:
         '''Returns True if the given [point] is inside the average diameter
         of the asteroid. It's for collision checking.'''
-        if self.center.distance(point) < self.get_avg_diameter():
+        if self.center.wrapped_distance_sq(point, WIDTH, HEIGHT) < self.collision_radius_sq:
             return True
         return False
 
     def is_collide_with(self, other: SpaceObject) -> bool:
-        '''Checks if the [other] object is collide with the asteroid'''
-        if self.is_point_inside(other.center):
+        '''Checks if the [other] object is collide with the asteroid. The points
+        of [other] are only checked if its bounding circle reaches the asteroid.'''
+        distance_sq = self.center.wrapped_distance_sq(other.center, WIDTH, HEIGHT)
+        if distance_sq < self.collision_radius_sq:
             return True
+        reach = self.collision_radius + other.bounding_radius
+        if distance_sq > reach*reach:
+            return False
         for point in other.border_points:
             if self.is_point_inside(point):
                 return True
         return False
 
-    def destroy(self)-> list['Asteroid']:
-        '''Destroys the asteroid and returns children'''
+    def destroy(self, asteroids: ObjectPool)-> list['Asteroid']:
+        '''Destroys the asteroid and returns children from the [asteroids] pool'''
         self.destroyed = True
         match self.type:
             case AsteroidType.WHOLE:
-                return [Asteroid(self.center, int(self.size*0.75), AsteroidType.HALF),
-                        Asteroid(self.center, int(self.size*0.75), AsteroidType.HALF)]
+                return [asteroids.acquire(self.center, int(self.size*0.75), AsteroidType.HALF),
+                        asteroids.acquire(self.center, int(self.size*0.75), AsteroidType.HALF)]
             case AsteroidType.HALF:
-                return [Asteroid(self.center, int(self.size*0.6), AsteroidType.QUARTER),
-                        Asteroid(self.center, int(self.size*0.6), AsteroidType.QUARTER)]
+                return [asteroids.acquire(self.center, int(self.size*0.6), AsteroidType.QUARTER),
+                        asteroids.acquire(self.center, int(self.size*0.6), AsteroidType.QUARTER)]
             case AsteroidType.QUARTER:
                 return []
 
@@ -263,6 +327,14 @@ class HealthPickUp(SpaceObject):
     def __init__(self, position, size) -> None:
 
         super().__init__(position, size)
+        self.init_pick_up()
+
+    def reset(self, position: Vector2D, size: int) -> None:
+        self.init_object(position, size)
+        self.init_pick_up()
+
+    def init_pick_up(self) -> None:
+        self.bounding_radius = self.size    # the pick-up range is wider than the shape
         self.spin_speed = 5
         self.color = "red"
         self.duration = 350
@@ -274,9 +346,9 @@ class HealthPickUp(SpaceObject):
         self.shape.append(Vector2D(-self.size//2, 0))
 
 
-    def update(self) -> None:
+    def move(self) -> None:
         self.heading += self.spin_speed
-        return super().update()
+        return super().move()
 
     def is_disposable(self):
         self.duration -= 1
@@ -284,92 +356,65 @@ class HealthPickUp(SpaceObject):
             self.is_to_dispose = True
         return self.is_to_dispose
 
+    def get_collision_radius(self) -> float:
+        return self.size
+
     def is_collide_with(self, player: "Player") -> bool:
-        if self.center.distance(player.center) <= self.size:
+        distance_sq = self.center.wrapped_distance_sq(player.center, WIDTH, HEIGHT)
+        if distance_sq <= self.collision_radius_sq:
             return True
+        reach = self.collision_radius + player.bounding_radius
+        if distance_sq > reach*reach:
+            return False
         for point in player.border_points:
-            if self.center.distance(point) <= self.size:
+            if self.center.wrapped_distance_sq(point, WIDTH, HEIGHT) <= self.collision_radius_sq:
                 return True
         return False
     
         
-class Spark:
-    '''Randomly flying pixel for explosion animation'''
-    def __init__(self, position: Vector2D, color = DRAW_COLOR) -> None:
-
-        self.position = position
-        self.speed = random_vector(0, 0, 1, 5).rotate(random_num(180), Vector2D.zero_vector())
-        self.color = color
-    
-    def draw(self, canvas: tk.Canvas) -> None:
-        canvas.create_rectangle(self.position.x-1,
-                                self.position.y-1,
-                                self.position.x+1,
-                                self.position.y+1,
-                                fill=self.color)
-    def update(self, canvas: tk.Canvas) -> None:
-        self.position += self.speed
-        self.draw(canvas)
-
-
-class SpinningLine:
-    """Randomly flying and spinnig line segment to animate player's spaceship explosion"""
-    def __init__(self, start_point: Vector2D, end_point: Vector2D, color = DRAW_COLOR) -> None:
-        self.start_point = start_point
-        self.end_point = end_point
-        self.speed = Vector2D(0, 0.5).rotate(random_num(180), Vector2D.zero_vector())
-        self.color = color
-        self.spin_degree = random_num(5)
-
-    def draw(self, canvas: tk.Canvas) -> None:
-        canvas.create_line(self.start_point.x, self.start_point.y,
-                            self.end_point.x, self.end_point.y,
-                            fill=self.color)
-    
-    def update(self, canvas: tk.Canvas) -> None:
-        midpoint = Vector2D.get_midpoint(self.start_point, self.end_point) + self.speed
-        self.start_point = (self.start_point+self.speed).rotate(self.spin_degree, midpoint)
-        self.end_point = (self.end_point+self.speed).rotate(self.spin_degree, midpoint)
-        self.draw(canvas)
-
-
 class ExplosionAnimation:
-    def __init__(self, position: Vector2D, duration: int, color=DRAW_COLOR) -> None:
+    """Sparks flying from [position], they are moved and drawn by the [particles] system"""
+    def __init__(self, particles: ParticleSystem, position: Vector2D, duration: int, color=DRAW_COLOR) -> None:
         
-        self.position = position
-        self.sparks = [Spark(self.position, color) for i in range(40)]
+        self.position = position.copy()
+        particles.spawn_sparks(position, 40, duration, color)
         self.duration = duration
         self.is_disposable = False
+        self.handle = None
     
-    def play(self, canvas: tk.Canvas):
+    def update(self) -> None:
         if self.duration < 1:
             self.is_disposable = True
             return
-        for spark in self.sparks:
-            spark.update(canvas)
         self.duration -= 1
 
+    def draw(self, renderer: Renderer) -> None:
+        pass
+
 
 class PlayerExplosionAnimation:
-    def __init__(self, player: Player, duration_frames: int) -> None:
-        self.init_segments(player)
+    """The sides of the player's spaceship flying apart as spinning line segments
+    of the [particles] system"""
+    def __init__(self, particles: ParticleSystem, player: Player, duration_frames: int) -> None:
+        self.init_segments(particles, player, duration_frames)
         self.duration_frames = duration_frames
         self.is_disposable = False
+        self.handle = None
 
-    def init_segments(self, player: Player) -> None:
-        self.segments = []
-        self.segments.append(SpinningLine(player.border_points[0], player.border_points[1], player.color))
-        self.segments.append(SpinningLine(player.border_points[1], player.border_points[2], player.color))
-        self.segments.append(SpinningLine(player.border_points[2], player.border_points[0], player.color))
+    def init_segments(self, particles: ParticleSystem, player: Player, duration_frames: int) -> None:
+        points = player.border_points
+        for start_point, end_point in ((points[0], points[1]), (points[1], points[2]), (points[2], points[0])):
+            particles.spawn_line(start_point, end_point, duration_frames, player.color)
 
-    def play(self, canvas: tk.Canvas) -> None:
+    def update(self) -> None:
         if self.duration_frames < 1:
             self.is_disposable = True
             return
-        for segment in self.segments:
-            segment.update(canvas)
         self.duration_frames -= 1
 
+    def draw(self, renderer: Renderer) -> None:
+        pass
+
 
 class TextAnimation:
     def __init__(self, position: Vector2D, duration: int, text: str, size: int = FONT_SIZE, color = TEXT_COLOR) -> None:
@@ -379,17 +424,22 @@ class TextAnimation:
         self.total_duration = duration
         self.duration = duration
         self.is_disposable = False
+        self.handle = None
+        self.is_visible = False
         self.color = color
-    def play(self, canvas: tk.Canvas):
+
+    def update(self) -> None:
         if self.total_duration == self.duration:    # the animation not displayed in the first frame
             self.duration -= 1
             return
         if self.duration < 1:
             self.is_disposable = True
             return
-        canvas.create_text(self.position.x, self.position.y, 
-            text=self.text, 
-            fill=self.color, font=(FONT, self.size, FONT_STYLE))
+        self.is_visible = True
         self.duration -= 1
+
+    def draw(self, renderer: Renderer) -> None:
+        if self.is_visible:
+            renderer.text(self.position.x, self.position.y, self.text, self.color, self.size)
         
         
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""Particle system of the explosions. The sparks and the spinning line
+segments of all explosions live in one preallocated pool of flat lists (or
+NumPy arrays), they are moved together once per frame and their slots are
+reused when they expire."""
+from __future__ import annotations
+from itertools import compress
+from typing import TYPE_CHECKING
+from config import *
+from model import Vector2D, COS_TABLE, SIN_TABLE, random_num, random_vector
+from arrays import np, use_numpy
+
+if TYPE_CHECKING:
+    from renderer import Renderer
+
+SPARK = 0
+LINE = 1
+# the particles this far outside the window are freed, they never come back
+OFFSCREEN_MARGIN = 50
+
+
+class ParticleSystem:
+    """Pool of particles in flat lists, one list per property. A particle is a
+    center point, a speed and a half-length vector, which is turned by the
+    spin every frame. A spark is drawn as a rectangle around its center, its
+    half-length is (1, 1) and it doesn't spin. A line is drawn from
+    center-half to center+half.
+    The sparks of an explosion are reduced by the quality settings
+    [spark_ratio], [life_ratio] and [merge_radius] (see quality.py)."""
+    def __init__(self, capacity: int = PARTICLE_POOL_SIZE) -> None:
+        self.capacity = 0
+        self.free_slots = []
+        self.kinds = bytearray()
+        self.colors = []
+        self.count = 0
+        self.spark_ratio = 1
+        self.life_ratio = 1
+        self.merge_radius = 0
+        self.frames = 0
+        self.explosions = []    # (x, y, frame of expiry) of the recent explosions with sparks
+        self.allocate(capacity)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def allocate(self, capacity: int) -> None:
+        '''Grows the pool to [capacity] slots'''
+        added = capacity-self.capacity
+        for name in ("x", "y", "speed_x", "speed_y", "half_x", "half_y", "cos", "sin"):
+            setattr(self, name, self.extend(getattr(self, name, None), added, 0.0))
+        self.life = self.extend(getattr(self, "life", None), added, 0)
+        self.active = self.extend(getattr(self, "active", None), added, False)
+        self.kinds += bytes(added)
+        self.colors += [DRAW_COLOR]*added
+        # the lowest slots are used first
+        self.free_slots = list(range(capacity-1, self.capacity-1, -1)) + self.free_slots
+        self.capacity = capacity
+
+    def extend(self, values: list | None, count: int, value) -> list:
+        '''Returns [values] extended with [count] copies of [value]'''
+        return (values or []) + [value]*count
+
+    def spawn(self, kind: int, x: float, y: float, speed_x: float, speed_y: float,
+              half_x: float, half_y: float, spin: int, life: int, color: str) -> None:
+        '''Puts a new particle into a free slot, the pool grows when it's full'''
+        if not self.free_slots:
+            self.allocate(self.capacity*2)
+        slot = self.free_slots.pop()
+        self.x[slot], self.y[slot] = x, y
+        self.speed_x[slot], self.speed_y[slot] = speed_x, speed_y
+        self.half_x[slot], self.half_y[slot] = half_x, half_y
+        self.cos[slot], self.sin[slot] = COS_TABLE[spin % 360], SIN_TABLE[spin % 360]
+        self.life[slot] = life
+        self.active[slot] = True
+        self.kinds[slot] = kind
+        self.colors[slot] = color
+        self.count += 1
+
+    def spawn_sparks(self, position: Vector2D, count: int, life: int, color: str = DRAW_COLOR) -> None:
+        """Adds [count] sparks flying from [position] to random directions for
+        [life] frames, less and shorter ones at lower quality. The random
+        speeds of all [count] sparks are drawn anyway, the game's random
+        numbers don't depend on the quality."""
+        spawned = 0 if self.is_merged(position) else round(count*self.spark_ratio)
+        life = max(1, round(life*self.life_ratio))
+        if spawned and self.merge_radius:
+            self.explosions.append((position.x, position.y, self.frames + life//2))
+        for i in range(count):
+            speed = random_vector(0, 0, 1, 5).rotate(random_num(180), Vector2D.zero_vector())
+            if i < spawned:
+                self.spawn(SPARK, position.x, position.y, speed.x, speed.y, 1, 1, 0, life, color)
+
+    def is_merged(self, position: Vector2D) -> bool:
+        '''Returns True if a recent explosion's sparks are flying within [merge_radius] of [position]'''
+        if not self.merge_radius:
+            return False
+        self.explosions = [explosion for explosion in self.explosions if explosion[2] > self.frames]
+        radius_sq = self.merge_radius**2
+        return any((x-position.x)**2 + (y-position.y)**2 < radius_sq for x, y, _ in self.explosions)
+
+    def spawn_line(self, start_point: Vector2D, end_point: Vector2D, life: int, color: str = DRAW_COLOR) -> None:
+        '''Adds a line segment flying and spinning randomly for [life] frames'''
+        speed = Vector2D(0, 0.5).rotate(random_num(180), Vector2D.zero_vector())
+        spin = random_num(5)
+        midpoint = Vector2D.get_midpoint(start_point, end_point)
+        self.spawn(LINE, midpoint.x, midpoint.y, speed.x, speed.y,
+                   end_point.x-midpoint.x, end_point.y-midpoint.y, spin, life, color)
+
+    def free(self, slot: int) -> None:
+        self.active[slot] = False
+        self.free_slots.append(slot)
+        self.count -= 1
+
+    def step(self) -> None:
+        '''Frees the expired and the offscreen particles, moves and spins the others'''
+        self.frames += 1
+        x, y, speed_x, speed_y, life = self.x, self.y, self.speed_x, self.speed_y, self.life
+        for slot in self.get_active_slots():
+            if (life[slot] == 0 or not -OFFSCREEN_MARGIN < x[slot] < WIDTH+OFFSCREEN_MARGIN
+                    or not -OFFSCREEN_MARGIN < y[slot] < HEIGHT+OFFSCREEN_MARGIN):
+                self.free(slot)
+                continue
+            life[slot] -= 1
+            x[slot] += speed_x[slot]
+            y[slot] += speed_y[slot]
+            if self.kinds[slot] == LINE:
+                self.spin(slot)
+
+    def spin(self, slot: int) -> None:
+        half_x, half_y, cos, sin = self.half_x[slot], self.half_y[slot], self.cos[slot], self.sin[slot]
+        self.half_x[slot] = half_x*cos + half_y*sin
+        self.half_y[slot] = -half_x*sin + half_y*cos
+
+    def get_active_slots(self) -> list[int]:
+        if self.count == 0:
+            return []
+        return list(compress(range(self.capacity), self.active))
+
+    def get_segments(self) -> list[tuple[int, list[int]]]:
+        '''Returns the slot and the canvas coordinates of every active particle'''
+        return [(slot, [int(self.x[slot]-self.half_x[slot]), int(self.y[slot]-self.half_y[slot]),
+                        int(self.x[slot]+self.half_x[slot]), int(self.y[slot]+self.half_y[slot])])
+                for slot in self.get_active_slots()]
+
+    def draw(self, renderer: Renderer) -> None:
+        """Draws the lines and the sparks (small rectangles) of each color together"""
+        lines = {}
+        sparks = {}
+        kinds, colors = self.kinds, self.colors
+        for slot, coords in self.get_segments():
+            shapes = lines if kinds[slot] == LINE else sparks
+            shapes.setdefault(colors[slot], []).append(coords)
+        for color, segments in lines.items():
+            renderer.lines(segments, color)
+        for color, rects in sparks.items():
+            renderer.rects(rects, color)
+
+
+class ArrayParticleSystem(ParticleSystem):
+    """Particle pool in NumPy arrays, moved and spun with array operations"""
+    def extend(self, values, count: int, value):
+        added = np.full(count, value)
+        return added if values is None else np.concatenate((values, added))
+
+    def step(self) -> None:
+        self.frames += 1
+        if self.count == 0:
+            return
+        x, y = self.x, self.y
+        expired = ((self.life == 0) | (x <= -OFFSCREEN_MARGIN) | (x >= WIDTH+OFFSCREEN_MARGIN)
+                   | (y <= -OFFSCREEN_MARGIN) | (y >= HEIGHT+OFFSCREEN_MARGIN))
+        for slot in np.flatnonzero(self.active & expired).tolist():
+            self.free(slot)
+        active = self.active
+        self.life[active] -= 1
+        self.x[active] += self.speed_x[active]
+        self.y[active] += self.speed_y[active]
+        # the sparks' spin is 0, turning them doesn't change them
+        half_x, half_y, cos, sin = self.half_x[active], self.half_y[active], self.cos[active], self.sin[active]
+        self.half_x[active] = half_x*cos + half_y*sin
+        self.half_y[active] = -half_x*sin + half_y*cos
+
+    def get_active_slots(self) -> list[int]:
+        return np.flatnonzero(self.active).tolist()
+
+    def get_segments(self) -> list[tuple[int, list[int]]]:
+        slots = np.flatnonzero(self.active)
+        x, y = self.x[slots], self.y[slots]
+        half_x, half_y = self.half_x[slots], self.half_y[slots]
+        coords = np.stack((x-half_x, y-half_y, x+half_x, y+half_y), axis=1).astype(int)
+        return list(zip(slots.tolist(), coords.tolist()))
+
+
+def make_particle_system(use_arrays: bool = ARRAY_PHYSICS) -> ParticleSystem:
+    """Returns the particle pool with PARTICLE_POOL_SIZE slots"""
+    if use_numpy(use_arrays):
+        return ArrayParticleSystem(PARTICLE_POOL_SIZE)
+    return ParticleSystem(PARTICLE_POOL_SIZE)
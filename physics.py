@@ -0,0 +1,129 @@
+"""Batched movement of the space objects. The NumPy backed store keeps the
+positions, speeds, headings and shape offsets of the objects in arrays and
+moves, wraps and rotates all of them at once. Without NumPy the objects
+are moved one by one by their own move() method."""
+from config import *
+from model import COS_TABLE, SIN_TABLE
+from arrays import np, use_numpy
+
+
+class PyBodyStore:
+    """Pure python store with the same interface as the NumPy one"""
+    def __init__(self) -> None:
+        self.objects = []
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def add(self, obj) -> None:
+        obj.body = len(self.objects)
+        self.objects.append(obj)
+
+    def remove(self, obj) -> None:
+        '''Removes [obj] by moving the last object into its slot'''
+        slot = obj.body
+        last = self.objects.pop()
+        if last is not obj:
+            self.objects[slot] = last
+            last.body = slot
+        obj.body = None
+
+    def step(self) -> None:
+        for obj in self.objects:
+            obj.move()
+
+
+class BodyStore:
+    """Struct of arrays store of the moving objects, one row per object.
+    The shapes are padded to the longest one with the first vertex."""
+    def __init__(self, capacity: int = 64, max_vertices: int = 8) -> None:
+        self.objects = []
+        self.max_vertices = max_vertices
+        self.cos_table = np.array(COS_TABLE)
+        self.sin_table = np.array(SIN_TABLE)
+        self.allocate(capacity)
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def allocate(self, capacity: int) -> None:
+        old_count = len(self.objects)
+        arrays = {"position": np.zeros((capacity, 2)),
+                  "speed": np.zeros((capacity, 2)),
+                  "heading": np.zeros(capacity),
+                  "spin": np.zeros(capacity),
+                  "wrap": np.zeros(capacity, dtype=bool),
+                  "shape": np.zeros((capacity, self.max_vertices, 2)),
+                  "vertex_count": np.zeros(capacity, dtype=int)}
+        for name, array in arrays.items():
+            if old_count:
+                array[:old_count] = getattr(self, name)[:old_count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def add(self, obj) -> None:
+        slot = len(self.objects)
+        if slot == self.capacity:
+            self.allocate(self.capacity*2)
+        if len(obj.shape) > self.max_vertices:
+            raise ValueError(f"{obj} has more than {self.max_vertices} vertices")
+        self.position[slot] = (obj.center.x, obj.center.y)
+        self.speed[slot] = (obj.speed.x, obj.speed.y)
+        self.heading[slot] = obj.heading
+        self.spin[slot] = obj.spin_speed
+        self.wrap[slot] = obj.is_wrapping
+        shape = [(point.x, point.y) for point in obj.shape]
+        self.shape[slot] = shape + shape[:1]*(self.max_vertices-len(shape))
+        self.vertex_count[slot] = len(shape)
+        obj.body = slot
+        self.objects.append(obj)
+
+    def remove(self, obj) -> None:
+        '''Removes [obj] by moving the last row into its slot'''
+        slot = obj.body
+        last_slot = len(self.objects)-1
+        last = self.objects.pop()
+        if last is not obj:
+            for array in (self.position, self.speed, self.heading, self.spin,
+                          self.wrap, self.shape, self.vertex_count):
+                array[slot] = array[last_slot]
+            self.objects[slot] = last
+            last.body = slot
+        obj.body = None
+
+    def step(self) -> None:
+        '''Moves, wraps and rotates every object, then writes the new
+        positions, headings and border points back to the objects'''
+        count = len(self.objects)
+        if count == 0:
+            return
+        position = self.position[:count]
+        heading = self.heading[:count]
+        position += self.speed[:count]
+        heading += self.spin[:count]
+        wrap = self.wrap[:count]
+        position[wrap] %= (WIDTH, HEIGHT)
+
+        # the headings are integers, their sine and cosine are looked up
+        degrees = heading.astype(int) % 360
+        cos, sin = self.cos_table[degrees][:, None], self.sin_table[degrees][:, None]
+        x, y = self.shape[:count, :, 0], self.shape[:count, :, 1]
+        points_x = (x*cos + y*sin + position[:, :1]).tolist()
+        points_y = (-x*sin + y*cos + position[:, 1:]).tolist()
+
+        # the border point lists are as long as the shapes, the padding is dropped by zip
+        for obj, (center_x, center_y), obj_heading, xs, ys in zip(
+                self.objects, position.tolist(), heading.tolist(), points_x, points_y):
+            obj.center.x = center_x
+            obj.center.y = center_y
+            obj.heading = int(obj_heading)
+            for point, x, y in zip(obj.border_points, xs, ys):
+                point.x = x
+                point.y = y
+
+
+def make_body_store(use_arrays: bool = ARRAY_PHYSICS):
+    """Returns the body store, see use_numpy() for the choice"""
+    if use_numpy(use_arrays):
+        return BodyStore()
+    return PyBodyStore()
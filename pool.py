@@ -0,0 +1,31 @@
+class ObjectPool:
+    """Free list of reusable objects of [cls]. acquire() reinitializes a
+    released object with its reset() method instead of creating a new one,
+    so the game doesn't allocate objects in the steady state. The reset()
+    method takes the same arguments as the constructor."""
+    def __init__(self, cls) -> None:
+        self.cls = cls
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.reused += 1
+        else:
+            obj = self.cls(*args)
+            self.created += 1
+        self.in_use += 1
+        return obj
+
+    def release(self, obj) -> None:
+        '''Gives back a disposed object, it mustn't be used after this'''
+        self.free.append(obj)
+        self.in_use -= 1
+
+    def get_stats(self) -> str:
+        return (f"{self.cls.__name__} pool: {self.in_use} used, {len(self.free)} free, "
+                f"{self.created} created, {self.reused} reused")
@@ -0,0 +1,78 @@
+import csv
+import json
+import time
+from collections import deque
+from config import *
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Returns the [percent] percentile of [values] (nearest rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered)-1, max(0, round(percent/100*len(ordered))-1))
+    return ordered[index]
+
+
+class FrameProfiler:
+    """Measures how long the phases of the game loop take. A frame is
+    between begin_frame() and end_frame(), mark() closes the current phase.
+    The last [window] frames are kept for the statistics."""
+    def __init__(self, window: int = PROFILE_WINDOW) -> None:
+        self.window = window
+        self.phases = {}
+        self.frame_times = deque(maxlen=window)
+        self.current = {}
+        self.frame_count = 0
+        self.frame_start = self.last_mark = time.perf_counter()
+
+    def begin_frame(self) -> None:
+        self.frame_start = self.last_mark = time.perf_counter()
+        self.current = {}
+
+    def mark(self, phase: str) -> None:
+        '''Adds the time since the previous mark to [phase]'''
+        now = time.perf_counter()
+        self.current[phase] = self.current.get(phase, 0) + now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self) -> None:
+        now = time.perf_counter()
+        self.frame_times.append(now - self.frame_start)
+        for phase in self.current:
+            if phase not in self.phases:
+                self.phases[phase] = deque([0.0]*(len(self.frame_times)-1), maxlen=self.window)
+        for phase, times in self.phases.items():
+            times.append(self.current.get(phase, 0.0))
+        self.current = {}
+        self.frame_count += 1
+
+    def get_phase_means(self) -> dict[str, float]:
+        """Returns the average time of each phase in ms"""
+        return {phase: sum(times)/len(times)*1000 for phase, times in self.phases.items() if times}
+
+    def get_frame_percentiles(self) -> dict[str, float]:
+        """Returns the p50/p95/p99 and the max frame time in ms"""
+        frame_times = list(self.frame_times)
+        stats = {f"p{percent}": percentile(frame_times, percent)*1000 for percent in (50, 95, 99)}
+        stats["max"] = max(frame_times, default=0.0)*1000
+        return stats
+
+    def get_summary(self) -> dict:
+        return {"frames": self.frame_count,
+                "frame_ms": self.get_frame_percentiles(),
+                "phase_mean_ms": self.get_phase_means()}
+
+    def export(self, filename: str) -> None:
+        """Writes the summary as JSON or the per-frame samples as CSV,
+        depending on the extension of [filename]"""
+        if filename.endswith(".csv"):
+            phases = list(self.phases)
+            with open(filename, mode='w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(["frame_ms"] + [f"{phase}_ms" for phase in phases])
+                for row in zip(self.frame_times, *(self.phases[phase] for phase in phases)):
+                    writer.writerow([f"{value*1000:.3f}" for value in row])
+            return
+        with open(filename, mode='w') as file:
+            json.dump(self.get_summary(), file, indent=2)
@@ -0,0 +1,81 @@
+"""Adaptive quality of the game screen. When the frames take longer than the
+budget, the effects are reduced level by level and the frames are rendered
+less often (the simulation still runs every step), when there's headroom
+again the quality is restored. Only cosmetic settings change, the simulation
+and its random numbers are the same at every level, so replays still match."""
+from collections import deque
+from config import *
+from particles import ParticleSystem
+
+
+class QualityLevel:
+    """[spark_ratio]: part of the sparks spawned by an explosion,
+    [life_ratio]: part of their lifetime, [merge_radius]: an explosion
+    closer than this (pixels) to a recent one gets no sparks,
+    [render_interval]: a frame is rendered in every n-th loop"""
+    def __init__(self, spark_ratio: float, life_ratio: float, merge_radius: int, render_interval: int) -> None:
+        self.spark_ratio = spark_ratio
+        self.life_ratio = life_ratio
+        self.merge_radius = merge_radius
+        self.render_interval = render_interval
+
+    def __str__(self) -> str:
+        return (f"sparks {self.spark_ratio:.0%} life {self.life_ratio:.0%} "
+                f"merge {self.merge_radius}px render 1/{self.render_interval}")
+
+
+LEVELS = [QualityLevel(1, 1, 0, 1),
+          QualityLevel(0.5, 0.75, 0, 1),
+          QualityLevel(0.25, 0.5, 30, 1),
+          QualityLevel(0.25, 0.5, 30, 2),
+          QualityLevel(0.1, 0.3, 60, 3)]
+
+
+class QualityGovernor:
+    """Chooses the quality level from the average of the last [window] frame
+    times. Above [budget] ms the quality is lowered, below [budget]*[headroom]
+    it's raised again. After a change the frame times are collected again
+    for a whole window, so one level's effect is seen before the next change."""
+    def __init__(self, budget: float = FRAME_BUDGET, window: int = QUALITY_WINDOW,
+                 headroom: float = 0.5, is_enabled: bool = ADAPTIVE_QUALITY) -> None:
+        self.budget = budget/1000
+        self.headroom = headroom
+        self.is_enabled = is_enabled
+        self.frame_times = deque(maxlen=window)
+        self.level = 0
+        self.loop_count = 0
+
+    def get_level(self) -> QualityLevel:
+        return LEVELS[self.level]
+
+    def update(self, frame_time: float) -> bool:
+        """Adds the duration of the last loop in seconds, returns True if the level changed"""
+        if not self.is_enabled:
+            return False
+        self.frame_times.append(frame_time)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return False
+        average = sum(self.frame_times)/len(self.frame_times)
+        if average > self.budget and self.level < len(LEVELS)-1:
+            self.set_level(self.level+1)
+            return True
+        if average < self.budget*self.headroom and self.level > 0:
+            self.set_level(self.level-1)
+            return True
+        return False
+
+    def set_level(self, level: int) -> None:
+        self.level = level
+        self.frame_times.clear()
+
+    def should_render(self) -> bool:
+        '''Returns True if the frame of this loop should be drawn'''
+        self.loop_count += 1
+        return self.loop_count % self.get_level().render_interval == 0
+
+    def apply(self, particles: ParticleSystem) -> None:
+        '''Sets the effect settings of the current level in [particles]'''
+        level = self.get_level()
+        particles.spark_ratio = level.spark_ratio
+        particles.life_ratio = level.life_ratio
+        particles.merge_radius = level.merge_radius
@@ -0,0 +1,294 @@
+"""Software rendering. The lines, rectangles and texts of a frame are
+rasterized into a preallocated RGB framebuffer (a bytearray, or a NumPy array
+if NumPy is installed). RasterRenderer uploads the whole frame into one
+canvas image with a single PhotoImage put, so the cost of a frame doesn't
+depend on the number of canvas items Tk would have to keep and redraw.
+FrameDumpRenderer saves the frames as PPM or PNG images without a display."""
+from __future__ import annotations
+import struct
+import zlib
+from typing import TYPE_CHECKING
+from config import *
+from renderer import Renderer
+from arrays import np, use_numpy
+if TYPE_CHECKING:
+    import tkinter as tk
+
+COLORS = {"black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0),
+          "green": (0, 255, 0), "blue": (0, 0, 255), "yellow": (255, 255, 0)}
+
+
+def get_rgb(color: str) -> tuple[int, int, int]:
+    """Returns the RGB values of a Tk color name or #rrggbb string"""
+    if color.startswith("#") and len(color) == 7:
+        return (int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16))
+    if color.lower() not in COLORS:
+        raise ValueError(f"unknown color: {color}")
+    return COLORS[color.lower()]
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+class FrameBuffer:
+    """[width]x[height] RGB pixels in a bytearray, row by row. The lines are
+    1 pixel wide, everything outside the buffer is clipped."""
+    def __init__(self, width: int, height: int, background: str = BG) -> None:
+        self.width = width
+        self.height = height
+        self.header = f"P6 {width} {height} 255\n".encode()
+        self.background = bytes(get_rgb(background))*(width*height)
+        self.pixels = bytearray(self.background)
+
+    def clear(self) -> None:
+        self.pixels[:] = self.background
+
+    def draw_lines(self, segments: list[tuple[float, float, float, float]], color: str) -> None:
+        '''Draws the (x0, y0, x1, y1) [segments] in [color]'''
+        rgb = bytes(get_rgb(color))
+        pixels, width, height = self.pixels, self.width, self.height
+        for x0, y0, x1, y1 in segments:
+            steps = int(max(abs(x1-x0), abs(y1-y0)))
+            step_x = (x1-x0)/steps if steps else 0
+            step_y = (y1-y0)/steps if steps else 0
+            for i in range(steps+1):
+                x = round(x0 + step_x*i)
+                y = round(y0 + step_y*i)
+                if 0 <= x < width and 0 <= y < height:
+                    index = (y*width + x)*3
+                    pixels[index:index+3] = rgb
+
+    def fill_rects(self, rects: list[tuple[float, float, float, float]], color: str) -> None:
+        '''Fills the (x0, y0, x1, y1) [rects] in [color], the corners are included'''
+        rgb = bytes(get_rgb(color))
+        for x0, y0, x1, y1 in rects:
+            x0, x1 = max(0, int(min(x0, x1))), min(self.width-1, int(max(x0, x1)))
+            y0, y1 = max(0, int(min(y0, y1))), min(self.height-1, int(max(y0, y1)))
+            if x0 > x1:
+                continue
+            row = rgb*(x1-x0+1)
+            for y in range(y0, y1+1):
+                index = (y*self.width + x0)*3
+                self.pixels[index:index+len(row)] = row
+
+    def get_bytes(self) -> bytes:
+        return bytes(self.pixels)
+
+    def get_ppm(self) -> bytes:
+        """Returns the frame as binary PPM image data"""
+        return self.header + self.get_bytes()
+
+    def get_png(self) -> bytes:
+        """Returns the frame as PNG image data"""
+        pixels = self.get_bytes()
+        row_size = self.width*3
+        # every row starts with its filter type, 0: none
+        data = b"".join(b"\0" + pixels[start:start+row_size] for start in range(0, len(pixels), row_size))
+        return (b"\x89PNG\r\n\x1a\n"
+                + png_chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0))
+                + png_chunk(b"IDAT", zlib.compress(data))
+                + png_chunk(b"IEND", b""))
+
+
+class ArrayFrameBuffer(FrameBuffer):
+    """Framebuffer in a NumPy array, every line of a color is rasterized together"""
+    def __init__(self, width: int, height: int, background: str = BG) -> None:
+        super().__init__(width, height, background)
+        self.background = np.frombuffer(self.background, dtype=np.uint8).reshape(height, width, 3)
+        self.pixels = self.background.copy()
+
+    def clear(self) -> None:
+        self.pixels[:] = self.background
+
+    def draw_lines(self, segments, color: str) -> None:
+        if len(segments) == 0:
+            return
+        x0, y0, x1, y1 = np.asarray(segments, dtype=float).T
+        lengths = np.maximum(np.abs(x1-x0), np.abs(y1-y0)).astype(int) + 1
+        # the pixels of all segments in one array: segment index and step along it
+        segment = np.repeat(np.arange(len(lengths)), lengths)
+        step = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths)-lengths, lengths)
+        ratio = step / np.maximum(lengths-1, 1)[segment]
+        x = np.rint(x0[segment] + (x1-x0)[segment]*ratio).astype(int)
+        y = np.rint(y0[segment] + (y1-y0)[segment]*ratio).astype(int)
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        self.pixels[y[inside], x[inside]] = get_rgb(color)
+
+    def fill_rects(self, rects, color: str) -> None:
+        if len(rects) == 0:
+            return
+        x0, y0, x1, y1 = np.asarray(rects, dtype=float).astype(int).T
+        x0, x1 = np.maximum(0, np.minimum(x0, x1)), np.minimum(self.width, np.maximum(x0, x1)+1)
+        y0, y1 = np.maximum(0, np.minimum(y0, y1)), np.minimum(self.height, np.maximum(y0, y1)+1)
+        widths = np.maximum(x1-x0, 0)
+        areas = widths*np.maximum(y1-y0, 0)
+        # the pixels of all rectangles in one array, like the lines
+        rect = np.repeat(np.arange(len(areas)), areas)
+        pixel = np.arange(areas.sum()) - np.repeat(np.cumsum(areas)-areas, areas)
+        x = x0[rect] + pixel % widths[rect]
+        y = y0[rect] + pixel // widths[rect]
+        self.pixels[y, x] = get_rgb(color)
+
+    def get_bytes(self) -> bytes:
+        return self.pixels.tobytes()
+
+
+def make_frame_buffer(width: int, height: int, background: str = BG, use_arrays: bool = True) -> FrameBuffer:
+    """Returns a [width]x[height] framebuffer cleared to [background]"""
+    if use_numpy(use_arrays):
+        return ArrayFrameBuffer(width, height, background)
+    return FrameBuffer(width, height, background)
+
+
+
+
+# 5x7 pixel font of the rasterized texts, the lower case letters are drawn as upper case
+GLYPH_ROWS = {
+    "A": "01110 10001 10001 11111 10001 10001 10001", "B": "11110 10001 10001 11110 10001 10001 11110",
+    "C": "01110 10001 10000 10000 10000 10001 01110", "D": "11110 10001 10001 10001 10001 10001 11110",
+    "E": "11111 10000 10000 11110 10000 10000 11111", "F": "11111 10000 10000 11110 10000 10000 10000",
+    "G": "01110 10001 10000 10111 10001 10001 01111", "H": "10001 10001 10001 11111 10001 10001 10001",
+    "I": "01110 00100 00100 00100 00100 00100 01110", "J": "00111 00010 00010 00010 00010 10010 01100",
+    "K": "10001 10010 10100 11000 10100 10010 10001", "L": "10000 10000 10000 10000 10000 10000 11111",
+    "M": "10001 11011 10101 10101 10001 10001 10001", "N": "10001 10001 11001 10101 10011 10001 10001",
+    "O": "01110 10001 10001 10001 10001 10001 01110", "P": "11110 10001 10001 11110 10000 10000 10000",
+    "Q": "01110 10001 10001 10001 10101 10010 01101", "R": "11110 10001 10001 11110 10100 10010 10001",
+    "S": "01111 10000 10000 01110 00001 00001 11110", "T": "11111 00100 00100 00100 00100 00100 00100",
+    "U": "10001 10001 10001 10001 10001 10001 01110", "V": "10001 10001 10001 10001 10001 01010 00100",
+    "W": "10001 10001 10001 10101 10101 10101 01010", "X": "10001 10001 01010 00100 01010 10001 10001",
+    "Y": "10001 10001 10001 01010 00100 00100 00100", "Z": "11111 00001 00010 00100 01000 10000 11111",
+    "0": "01110 10001 10011 10101 11001 10001 01110", "1": "00100 01100 00100 00100 00100 00100 01110",
+    "2": "01110 10001 00001 00010 00100 01000 11111", "3": "11111 00010 00100 00010 00001 10001 01110",
+    "4": "00010 00110 01010 10010 11111 00010 00010", "5": "11111 10000 11110 00001 00001 10001 01110",
+    "6": "00110 01000 10000 11110 10001 10001 01110", "7": "11111 00001 00010 00100 01000 01000 01000",
+    "8": "01110 10001 10001 01110 10001 10001 01110", "9": "01110 10001 10001 01111 00001 00010 01100",
+    ":": "00000 01100 01100 00000 01100 01100 00000", ".": "00000 00000 00000 00000 00000 01100 01100",
+    ",": "00000 00000 00000 00000 01100 00100 01000", "'": "01100 00100 01000 00000 00000 00000 00000",
+    "+": "00000 00100 00100 11111 00100 00100 00000", "-": "00000 00000 00000 11111 00000 00000 00000",
+    "=": "00000 00000 11111 00000 11111 00000 00000", "_": "00000 00000 00000 00000 00000 00000 11111",
+    "/": "00000 00001 00010 00100 01000 10000 00000", "|": "00100 00100 00100 00100 00100 00100 00100",
+    "<": "00010 00100 01000 10000 01000 00100 00010", ">": "01000 00100 00010 00001 00010 00100 01000",
+    "(": "00010 00100 01000 01000 01000 00100 00010", ")": "01000 00100 00010 00010 00010 00100 01000",
+    "!": "00100 00100 00100 00100 00100 00000 00100", "?": "01110 10001 00001 00010 00100 00000 00100",
+    "%": "11000 11001 00010 00100 01000 10011 00011", " ": "00000 00000 00000 00000 00000 00000 00000",
+}
+# the (column, row) of the pixels of every glyph
+GLYPHS = {char: [(column, row) for row, bits in enumerate(rows.split()) for column, bit in enumerate(bits) if bit == "1"]
+          for char, rows in GLYPH_ROWS.items()}
+GLYPH_WIDTH = 6     # pixels with the spacing, in font pixels
+GLYPH_HEIGHT = 9
+
+
+class FrameBufferRenderer(Renderer):
+    """Rasterizes the frames into a framebuffer. The shapes are collected by
+    color and drawn together in present(): first the filled rectangles, then
+    the lines (the outlines too), the texts last. It only renders, the subclasses show the frames."""
+    def __init__(self, width: int = WIDTH, height: int = HEIGHT, use_arrays: bool = True) -> None:
+        self.frame = make_frame_buffer(width, height, BG, use_arrays)
+        self.clear()
+
+    def clear(self) -> None:
+        self.line_segments = {}     # color -> segments
+        self.filled_rects = {}      # color -> rectangles
+        self.text_rects = {}        # color -> pixels of the glyphs as rectangles
+
+    def lines(self, segments: list[list[float]], color: str) -> None:
+        self.line_segments.setdefault(color, []).extend(segments)
+
+    def polyline(self, coords: list[float], color: str, width: int = 1) -> None:
+        segments = self.line_segments.setdefault(color, [])
+        for i in range(0, len(coords)-3, 2):
+            segments.append(coords[i:i+4])
+
+    def rect(self, coords: list[float], fill: str = "", outline: str | None = None) -> None:
+        if fill:
+            self.filled_rects.setdefault(fill, []).append(coords)
+        if outline:
+            x0, y0, x1, y1 = coords
+            self.polyline([x0, y0, x1, y0, x1, y1, x0, y1, x0, y0], outline)
+
+    def rects(self, rects: list[list[float]], fill: str) -> None:
+        self.filled_rects.setdefault(fill, []).extend(rects)
+
+    def text(self, x: float, y: float, text: str, color: str = TEXT_COLOR, size: int = FONT_SIZE,
+             anchor: str = "center", font: str = FONT, style: str = FONT_STYLE) -> None:
+        """Draws the text with the built-in font, scaled to about the size
+        of the Tk font of [size] points. [font] and [style] are ignored."""
+        scale = max(1, round(size/6))
+        text_lines = text.upper().expandtabs().split("\n")
+        width = (max(len(line) for line in text_lines)*GLYPH_WIDTH - 1)*scale
+        height = (len(text_lines)*GLYPH_HEIGHT - 2)*scale
+        if anchor == "center":
+            x, y = x - width/2, y - height/2
+        else:
+            x -= width if "e" in anchor else 0 if "w" in anchor else width/2
+            y -= height if "s" in anchor else 0 if "n" in anchor else height/2
+        rects = self.text_rects.setdefault(color, [])
+        for line_index, line in enumerate(text_lines):
+            top = int(y) + line_index*GLYPH_HEIGHT*scale
+            for char_index, char in enumerate(line):
+                left = int(x) + char_index*GLYPH_WIDTH*scale
+                for column, row in GLYPHS.get(char, GLYPHS["?"]):
+                    x0, y0 = left + column*scale, top + row*scale
+                    rects.append((x0, y0, x0+scale-1, y0+scale-1))
+
+    def render(self) -> None:
+        frame = self.frame
+        frame.clear()
+        for color, rects in self.filled_rects.items():
+            frame.fill_rects(rects, color)
+        for color, segments in self.line_segments.items():
+            frame.draw_lines(segments, color)
+        for color, rects in self.text_rects.items():
+            frame.fill_rects(rects, color)
+
+    def present(self) -> None:
+        self.render()
+
+
+class RasterRenderer(FrameBufferRenderer):
+    """Shows the frames in a single image item of the Tk canvas"""
+    def __init__(self, canvas: tk.Canvas, use_arrays: bool = True) -> None:
+        super().__init__(WIDTH, HEIGHT, use_arrays)
+        self.canvas = canvas
+        self.image = None
+        self.image_id = None
+        self.item_count = 1
+
+    def present(self) -> None:
+        """Renders the frame and puts it into the canvas image as PPM data"""
+        self.render()
+        if self.image is None:
+            # tkinter is only imported when the frames are shown
+            import tkinter as tk
+            self.image = tk.PhotoImage(master=self.canvas, width=WIDTH, height=HEIGHT)
+            self.image_id = self.canvas.create_image(0, 0, image=self.image, anchor="nw")
+        self.canvas.tk.call(self.image.name, "put", self.frame.get_ppm(), "-format", "ppm")
+
+
+class FrameDumpRenderer(FrameBufferRenderer):
+    """Saves every frame for offline capture. A .ppm [filename] gets all
+    frames one after the other (a PPM stream, e.g. for ffmpeg -f image2pipe),
+    a .png one is numbered for each frame: frame.png -> frame_000001.png"""
+    def __init__(self, filename: str, use_arrays: bool = True) -> None:
+        super().__init__(WIDTH, HEIGHT, use_arrays)
+        self.filename = filename
+        self.is_png = filename.lower().endswith(".png")
+        self.file = None if self.is_png else open(filename, mode='wb')
+        self.frame_count = 0
+
+    def present(self) -> None:
+        self.render()
+        self.frame_count += 1
+        if not self.is_png:
+            self.file.write(self.frame.get_ppm())
+            return
+        name, extension = self.filename[:-4], self.filename[-4:]
+        with open(f"{name}_{self.frame_count:06d}{extension}", mode='wb') as file:
+            file.write(self.frame.get_png())
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,142 @@
+"""Renderers: everything on the screen is drawn through one of them. A frame
+is drawn between clear() and present(), the objects draw themselves again in
+every frame, the renderer decides what it costs. CanvasRenderer draws on the
+Tk canvas, NullRenderer doesn't draw at all (to measure the simulation
+alone), the framebuffer renderers of raster.py rasterize the frames into an
+image or into files."""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from config import *
+from commandbuffer import FrameCommandBuffer
+if TYPE_CHECKING:
+    import tkinter as tk
+    from world import World
+
+
+class Renderer:
+    """Base class of the renderers, it draws nothing"""
+    item_count = 0
+
+    def clear(self) -> None:
+        '''Starts a new frame'''
+        pass
+
+    def lines(self, segments: list[list[float]], color: str) -> None:
+        '''Draws separate line segments, each given as [x0, y0, x1, y1]'''
+        pass
+
+    def polyline(self, coords: list[float], color: str, width: int = 1) -> None:
+        '''Draws a line through the flat list of x, y [coords]'''
+        pass
+
+    def rect(self, coords: list[float], fill: str = "", outline: str | None = None) -> None:
+        '''Draws the rectangle [x0, y0, x1, y1], filled if [fill] is given'''
+        pass
+
+    def rects(self, rects: list[list[float]], fill: str) -> None:
+        '''Draws many filled rectangles without outline'''
+        for coords in rects:
+            self.rect(coords, fill)
+
+    def text(self, x: float, y: float, text: str, color: str = TEXT_COLOR, size: int = FONT_SIZE,
+             anchor: str = "center", font: str = FONT, style: str = FONT_STYLE) -> None:
+        pass
+
+    def present(self) -> None:
+        '''Shows the frame drawn since clear()'''
+        pass
+
+
+class NullRenderer(Renderer):
+    """Skips every drawing, the game loop costs only the simulation"""
+    pass
+
+
+class CanvasRenderer(Renderer):
+    """Draws on a Tk canvas. The canvas items are kept between the frames:
+    the n-th line of a frame reuses the line item of the n-th line of the
+    previous frames (and so on for the rectangles and texts), only its
+    coordinates and its changed options are sent, the items not used in a
+    frame are hidden. The commands of a frame are sent in one Tcl call."""
+    def __init__(self, canvas: tk.Canvas) -> None:
+        self.commands = FrameCommandBuffer(canvas)
+        self.items = {"line": [], "rectangle": [], "text": []}   # [handle, options, is_visible]
+        self.used = dict.fromkeys(self.items, 0)
+        self.moved = []
+
+    @property
+    def item_count(self) -> int:
+        return self.commands.item_count
+
+    def clear(self) -> None:
+        for kind in self.used:
+            self.used[kind] = 0
+        self.moved = []
+
+    def draw_item(self, kind: str, coords: list[float], options: dict) -> None:
+        items = self.items[kind]
+        index = self.used[kind]
+        self.used[kind] += 1
+        if index == len(items):
+            items.append([self.commands.create(kind, coords, options), options, True])
+            return
+        item = items[index]
+        handle, old_options, is_visible = item
+        if options != old_options or not is_visible:
+            changed = {name: value for name, value in options.items() if old_options.get(name) != value}
+            if not is_visible:
+                changed["state"] = "normal"
+            self.commands.itemconfigure(handle, **changed)
+            item[1] = options
+            item[2] = True
+        self.moved.append((handle, coords))
+
+    def lines(self, segments: list[list[float]], color: str) -> None:
+        options = {"fill": color, "width": 1}
+        for segment in segments:
+            self.draw_item("line", segment, options)
+
+    def polyline(self, coords: list[float], color: str, width: int = 1) -> None:
+        self.draw_item("line", coords, {"fill": color, "width": width})
+
+    def rect(self, coords: list[float], fill: str = "", outline: str | None = None) -> None:
+        self.draw_item("rectangle", coords, {"fill": fill, "outline": outline or ""})
+
+    def text(self, x: float, y: float, text: str, color: str = TEXT_COLOR, size: int = FONT_SIZE,
+             anchor: str = "center", font: str = FONT, style: str = FONT_STYLE) -> None:
+        self.draw_item("text", [x, y], {"text": text, "fill": color, "font": (font, size, style),
+                                        "anchor": anchor, "tags": "text"})
+
+    def present(self) -> None:
+        """Hides the items left over, moves the others with one command and
+        sends the frame to Tcl"""
+        for kind, items in self.items.items():
+            for item in items[self.used[kind]:]:
+                if item[2]:
+                    self.commands.itemconfigure(item[0], state="hidden")
+                    item[2] = False
+        self.commands.coords_many(self.moved)
+        self.moved = []
+        # keeps the texts above the items created in this frame
+        self.commands.tag_raise("text")
+        self.commands.flush()
+
+
+def draw_world(renderer: Renderer, world: World, get_offset=None) -> None:
+    """Draws the objects, the animations and the particles of [world].
+    [get_offset] returns the drawing offset of an object, if it's given."""
+    for obj in world.get_space_objects():
+        if get_offset is None:
+            obj.draw(renderer)
+        else:
+            obj.draw(renderer, get_offset(obj))
+    for animation in world.animations:
+        animation.draw(renderer)
+    world.particles.draw(renderer)
+
+
+def draw_frame(renderer: Renderer, world: World) -> None:
+    """Draws a whole frame of [world] without the HUD, for the headless runs"""
+    renderer.clear()
+    draw_world(renderer, world)
+    renderer.present()
@@ -0,0 +1,98 @@
+"""Recording and replaying games. A replay file stores the seed of the game
+and the player's inputs of every frame, run length encoded, so replaying it
+gives exactly the same game. Usage: python replay.py FILE [FRAMES.ppm|FRAMES.png]
+saves the frames of the game too, if the second file is given."""
+import struct
+import sys
+import time
+from profiler import FrameProfiler
+from world import World, PlayerInput
+from renderer import Renderer, draw_frame
+from raster import FrameDumpRenderer
+
+HEADER = struct.Struct("<4sBQ?II")      # magic, version, seed, NumPy physics, frames, checksum
+RUN = struct.Struct("<BH")              # input bits, frame count
+MAGIC = b"AREP"
+VERSION = 3
+
+
+class Replay:
+    """Seed, physics backend and per-frame input bits of a game"""
+    def __init__(self, seed: int, uses_arrays: bool, inputs: bytearray | None = None, checksum: int = 0) -> None:
+        self.seed = seed
+        self.uses_arrays = uses_arrays
+        self.inputs = inputs if inputs is not None else bytearray()
+        self.checksum = checksum
+
+    def save(self, filename: str) -> None:
+        with open(filename, mode='wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.seed, self.uses_arrays, len(self.inputs), self.checksum))
+            start = 0
+            while start < len(self.inputs):
+                bits = self.inputs[start]
+                end = start+1
+                while end < len(self.inputs) and self.inputs[end] == bits and end-start < 0xFFFF:
+                    end += 1
+                file.write(RUN.pack(bits, end-start))
+                start = end
+
+    @classmethod
+    def load(cls, filename: str) -> "Replay":
+        with open(filename, mode='rb') as file:
+            data = file.read()
+        magic, version, seed, uses_arrays, frames, checksum = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{filename} is not a version {VERSION} replay file")
+        inputs = bytearray()
+        for bits, count in RUN.iter_unpack(data[HEADER.size:]):
+            inputs += bytes([bits])*count
+        if len(inputs) != frames:
+            raise ValueError(f"{filename} is truncated")
+        return Replay(seed, uses_arrays, inputs, checksum)
+
+    def create_world(self, profiler: FrameProfiler | None = None) -> World:
+        """Returns a new world set up like the recorded one"""
+        return World(profiler, seed=self.seed, use_arrays=self.uses_arrays)
+
+    def get_input(self, frame: int) -> PlayerInput:
+        return PlayerInput.from_bits(self.inputs[frame])
+
+
+class ReplayRecorder:
+    """Records the inputs of every step of [world]"""
+    def __init__(self, world: World) -> None:
+        self.world = world
+        self.replay = Replay(world.seed, world.uses_arrays)
+
+    def record(self, inputs: PlayerInput) -> None:
+        self.replay.inputs.append(inputs.to_bits())
+
+    def save(self, filename: str) -> None:
+        self.replay.checksum = self.world.get_checksum()
+        self.replay.save(filename)
+
+
+def play(replay: Replay, renderer: Renderer | None = None) -> World:
+    """Simulates the recorded game as fast as possible and returns the world.
+    Every frame is drawn with [renderer] if it's given."""
+    world = replay.create_world()
+    for bits in replay.inputs:
+        world.step(PlayerInput.from_bits(bits))
+        if renderer is not None:
+            draw_frame(renderer, world)
+    return world
+
+
+if __name__ == "__main__":
+    replay = Replay.load(sys.argv[1])
+    renderer = FrameDumpRenderer(sys.argv[2]) if len(sys.argv) > 2 else None
+    start = time.perf_counter()
+    world = play(replay, renderer)
+    elapsed = time.perf_counter()-start
+    if renderer is not None:
+        renderer.close()
+    is_exact = world.get_checksum() == replay.checksum
+    print(f"frames: {world.frames} score: {world.score} round: {world.levels} "
+          f"time: {elapsed:.2f} s ({world.frames/max(elapsed, 1e-9):.0f} frames/s) "
+          f"{'identical' if is_exact else 'DIFFERENT'} to the recording")
+    sys.exit(0 if is_exact else 1)
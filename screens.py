@@ -1,10 +1,17 @@
-import tkinter as tk
 from config import *
 from highscore import HighScoreTable
 from model import *
 from objects import *
+from world import PlayerInput
+from renderer import Renderer, draw_world
+from replay import ReplayRecorder
+from inputs import make_input_provider
+from quality import QualityGovernor
 import main
+import os
+import sys
 import time
+from collections import Counter
 
 
 class Screen:
@@ -12,9 +19,11 @@ class Screen:
     def __init__(self, window: main.Window) -> None:
         self.app = window
         self.canvas = window.canvas
+        self.renderer = window.renderer
         self.canvas.focus_set()
         self.canvas.bind("<KeyPress>", self.key_press_command)
         self.canvas.bind("<KeyRelease>", self.key_release_command)
+        self.is_dirty = True
     
     def key_press_command(self, event):
         pass
@@ -25,58 +34,123 @@ class Screen:
     def loop(self):
         pass
 
+    def request_redraw(self) -> None:
+        """Marks the screen to be redrawn once when the event loop gets idle.
+        Menu screens don't redraw periodically, only after a change."""
+        if self.is_dirty:
+            return
+        self.is_dirty = True
+        self.canvas.after_idle(self.loop)
+
 
 class GameScreen(Screen):
-    """The main game object"""
+    """The main game object, draws the World and passes the inputs of the
+    PLAYER_INPUT provider to it"""
     def __init__(self, window: main.Window) -> None:
         super().__init__(window)
         self.create_new_game()
     
     def create_new_game(self) -> None:
         """Resets all of the game variables, starts a new game"""
-        self.canvas.delete("all")
-        self.player = Player(Vector2D(WIDTH//2, HEIGHT//2), size = PLAYER_SIZE)
-        self.asteroids = []
-        self.missles = []
-        self.animations = []
-        self.pick_ups = []
-        self.levels = START_LEVEL
-        self.score = 0
-        self.lives = START_LIVES
-        self.is_new_wave = True
-        self.is_game_over = False
+        self.profiler = self.app.profiler
+        self.input_provider = make_input_provider(PLAYER_INPUT)
+        self.world = self.input_provider.create_world(self.profiler)
+        self.governor = QualityGovernor()
+        self.governor.apply(self.world.particles)
+        self.recorder = ReplayRecorder(self.world) if REPLAY_DIR else None
         self.is_paused = True
-        self.is_shooting = False
-        self.is_accelerating = False
-        self.is_turning_left = False
-        self.is_turning_right = False
         self.is_debug_on = False
         self.time = time.time()
+        self.profile_text = ""
+        self.previous_positions = {}
+        self.after_id = None
+        self.reset_clock()
+
+    def reset_clock(self) -> None:
+        """Restarts the frame timing, the next loop runs one simulation step"""
+        self.last_time = time.perf_counter()
+        self.deadline = self.last_time
+        self.accumulator = STEP_TIME
 
     def loop(self) -> None:
         '''The main gameloop'''
-        if self.is_game_over:
-            end_screen = EndScreen(self.app, self.score)
+        if self.world.is_game_over:
+            self.save_replay()
+            end_screen = EndScreen(self.app, self.world.score)
             self.is_paused = True
             end_screen.loop()
-        if self.lives < 0:
-            if not self.player.is_destroyed:
-                self.animations.append(TextAnimation(Vector2D(WIDTH//2, HEIGHT//4), 280, "GAME OVER", WIDTH//20))
-                self.animations.append(PlayerExplosionAnimation(self.player, 280))
-                self.animations.append(ExplosionAnimation(self.player.center, 30, PLAYER_COLOR))
-                self.player.is_destroyed = True      
-            if len(self.animations) == 0:
-                self.is_game_over = True
-        self.level_controller()
-        self.canvas.delete("all") 
-        self.update_asteroids()
-        self.update_missles()
-        self.update_pick_ups()
-        self.update_player()
-        self.update_animations()
-        self.update_HUD()
+            return
+        self.profiler.begin_frame()
+        self.run_steps()
+        # the simulation keeps its rate, only the rendering is skipped at low quality
+        if self.is_paused or self.governor.should_render():
+            self.draw(self.accumulator / STEP_TIME)
+        self.profiler.end_frame()
         if not self.is_paused:
-            self.canvas.after(REFRESH_RATE, self.loop)
+            self.update_quality()
+            self.schedule_next_frame()
+
+    def update_quality(self) -> None:
+        """Passes the time of the last loop to the governor, which lowers
+        or restores the quality of the effects"""
+        if self.governor.update(self.profiler.frame_times[-1]):
+            self.governor.apply(self.world.particles)
+
+    def run_steps(self) -> None:
+        """Runs as many fixed length simulation steps as the elapsed wall time
+        requires, at most MAX_FRAME_STEPS. The game speed doesn't depend on
+        how long a frame takes, a slow machine only renders less frames."""
+        now = time.perf_counter()
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        steps = 0
+        while self.accumulator >= STEP_TIME and steps < MAX_FRAME_STEPS:
+            if RENDER_INTERPOLATION:
+                self.save_positions()
+            inputs = self.get_input()
+            if self.recorder is not None:
+                self.recorder.record(inputs)
+            self.world.step(inputs)
+            self.accumulator -= STEP_TIME
+            steps += 1
+        if self.accumulator >= STEP_TIME:
+            # too far behind, the rest of the lag is dropped instead of catching up
+            self.accumulator = 0
+
+    def save_replay(self) -> None:
+        """Saves the recorded inputs of the finished game into REPLAY_DIR"""
+        if self.recorder is None:
+            return
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        filename = time.strftime("game_%Y%m%d_%H%M%S") + f"_{self.world.seed}.rep"
+        self.recorder.save(os.path.join(REPLAY_DIR, filename))
+        self.recorder = None
+
+    def schedule_next_frame(self) -> None:
+        """Schedules the next loop to the next frame deadline, so the time spent
+        in this frame doesn't delay the following ones"""
+        now = time.perf_counter()
+        self.deadline += STEP_TIME
+        if self.deadline < now - STEP_TIME:
+            self.deadline = now
+        delay = max(0, int((self.deadline - now)*1000))
+        self.after_id = self.canvas.after(delay, self.loop)
+
+    def save_positions(self) -> None:
+        # keyed by the handles, an object reused from a pool gets a new one
+        self.previous_positions = {obj.handle: (obj.center.x, obj.center.y)
+                                   for obj in self.world.get_space_objects()}
+
+    def get_draw_offset(self, obj: SpaceObject, alpha: float) -> tuple[float, float]:
+        """Returns the offset that moves [obj] back between its previous and
+        current position, [alpha] is the fraction of the next step already elapsed"""
+        if obj.handle not in self.previous_positions:
+            return (0, 0)
+        x, y = self.previous_positions[obj.handle]
+        dx, dy = x - obj.center.x, y - obj.center.y
+        if abs(dx) > WIDTH/2 or abs(dy) > HEIGHT/2:     # wrapped around the edge
+            return (0, 0)
+        return (dx*(1-alpha), dy*(1-alpha))
         
     def get_FPS(self) -> str:
         """Calculates Frames per second (FPS) and returns it as a one-decimal-number string"""
@@ -86,158 +160,69 @@ class GameScreen(Screen):
             return "{:.1f}".format(1/delta_time)
         return '0.0'
 
-    def update_asteroids(self) -> None:
-        for asteroid in self.asteroids:
-            self.detect_collision(asteroid)
-            asteroid.update()
-            if asteroid.is_to_dispose:
-                self.asteroids.remove(asteroid)
-                del asteroid
-            else:
-                asteroid.draw(self.canvas)
+    def get_input(self) -> PlayerInput:
+        return self.input_provider.get_input(self.world)
 
-    def update_missles(self):
-        for missle in self.missles:
-            if missle.is_to_dispose:
-                self.missles.remove(missle)
-            else:
-                missle.update()
-                missle.draw(self.canvas)
-
-    def update_player(self):
-        if self.is_shooting:
-            self.shoot()
-        if self.is_accelerating:
-            self.player.accelerate()
-        if self.is_turning_left:
-            self.player.rotate(TURNING_RATE)
-        if self.is_turning_right:
-            self.player.rotate(-TURNING_RATE)
-        self.player.update()
-        self.player.draw(self.canvas)
-    
-    def update_animations(self):
-        for animation in self.animations:
-            if animation.is_disposable:
-                self.animations.remove(animation)
-                del animation
-            else:
-                animation.play(self.canvas)
-
-    def update_pick_ups(self):
-        for pick_up in self.pick_ups:
-            if pick_up.is_collide_with(self.player):
-                pick_up.is_to_dispose = True
-                self.lives += 1
-                self.animations.append(TextAnimation(Vector2D(pick_up.center.x,pick_up.center.y),
-                                                 40, "+1", FONT_SIZE, color='red'))
-                
-            if pick_up.is_to_dispose:
-                self.pick_ups.remove(pick_up)
-            else:
-                pick_up.update()
-                pick_up.draw(self.canvas)
-            
-    def detect_collision(self, asteroid: Asteroid) -> None:
-        '''Detect collision with Player or missles'''
-        if asteroid.is_collide_with(self.player):
-            self.player_collision(asteroid)
-            return
-        for missle in self.missles:
-            if asteroid.is_collide_with(missle):
-                self.missle_collision(missle, asteroid)  
-
-    def level_controller(self) -> None:
-        """Starts a new level by adding new asteroids to the room
-        when all of the existing ones were destroyed"""
-        if self.is_new_wave:
-            self.levels += 1
-            for i in range(self.levels):
-                self.asteroids.append(Asteroid(self.safe_distance_position(100), 
-                                        size = ASTEROID_SIZE, 
-                                        type = AsteroidType.WHOLE))
-            self.animations.append(TextAnimation(Vector2D(WIDTH//2, HEIGHT//3),
-                                                 80, f"ROUND {self.levels}", FONT_SIZE*2))
-            self.is_new_wave = False
-        if not self.asteroids and not self.animations and not self.missles:
-            self.is_new_wave = True
-    
-    def safe_distance_position(self, distance: int) -> Vector2D:
-        """Returns a random position (Vector2D) outside the given [distance] from the player,
-        but inside the window. It's for adding new asteroids to the room.
-        """
-        position = random_vector(0, WIDTH, 0, HEIGHT)
-        while self.player.center.distance(position) < distance:
-            position = random_vector(0, WIDTH, 0, HEIGHT)
-        return position
-
-    def player_collision(self, asteroid: Asteroid) -> None:
-        """Handles the asteroid's collision with the Player"""
-        if self.player.is_invincible:
-            return
-        if self.player.is_destroyed:
-            return
-        self.asteroids += asteroid.destroy()
-        self.lives -= 1
-        self.player.set_invincible()
-        self.animations.append(ExplosionAnimation(asteroid.center, 50))
-
-    def missle_collision(self, missle: Missle, asteroid: Asteroid) -> None:
-        """Handles the asteroid's collision with a missle"""
-        if missle.is_to_dispose:
-            return
-        missle.is_to_dispose = True
-        self.asteroids += asteroid.destroy()
-        if asteroid.type is AsteroidType.QUARTER and random_bool(HEALTH_DROP_FREQ):
-            self.pick_ups.append(HealthPickUp(asteroid.center, 10))
-        self.score += 1
-        self.animations.append(ExplosionAnimation(asteroid.center, 50))
+    def draw(self, alpha: float = 1) -> None:
+        """Draws the world and the HUD through the renderer"""
+        mark = self.profiler.mark
+        self.renderer.clear()
+        mark("clear")
+        if RENDER_INTERPOLATION:
+            draw_world(self.renderer, self.world, lambda obj: self.get_draw_offset(obj, alpha))
+        else:
+            draw_world(self.renderer, self.world)
+        mark("draw")
+        self.update_HUD()
+        mark("HUD")
+        self.renderer.present()
+        mark("present")
 
     def update_HUD(self) -> None:
         """Displays and updates text of levels, scores and lives count on the screen"""
-        self.canvas.create_text(FONT_SIZE*4, FONT_SIZE+2, 
-            text=f"ROUND: {self.levels}", 
-            fill=TEXT_COLOR, font=(FONT, FONT_SIZE, FONT_STYLE))
-        
-        self.canvas.create_text(WIDTH-(FONT_SIZE*5), FONT_SIZE+2, 
-            text=f"SCORE: {self.score:03d}", 
-            fill=TEXT_COLOR, font=(FONT, FONT_SIZE, FONT_STYLE))
-        
-        self.canvas.create_text(WIDTH//2, FONT_SIZE+2, 
-            text=('+'*self.lives), #♡
-            fill=TEXT_COLOR, font=(FONT, int(FONT_SIZE*1.5), FONT_STYLE))
-                    
-        if self.is_paused and not self.is_game_over:
-            self.canvas.create_text(WIDTH//2, HEIGHT//3, 
-                text="||", 
-                fill=TEXT_COLOR, font=(FONT, WIDTH//10, FONT_STYLE))
-            
-            self.canvas.create_text(WIDTH//2, HEIGHT*0.75, 
-                text=INSTRUCTIONS, 
-                fill=TEXT_COLOR, font=(FONT, FONT_SIZE, FONT_STYLE))
-            
+        text = self.renderer.text
+        text(FONT_SIZE*4, FONT_SIZE+2, f"ROUND: {self.world.levels}")
+        text(WIDTH-(FONT_SIZE*5), FONT_SIZE+2, f"SCORE: {self.world.score:03d}")
+        text(WIDTH//2, FONT_SIZE+2, '+'*self.world.lives, size=int(FONT_SIZE*1.5)) #♡
+
+        if self.is_paused and not self.world.is_game_over:
+            text(WIDTH//2, HEIGHT//3, "||", size=WIDTH//10)
+            text(WIDTH//2, HEIGHT*0.75, INSTRUCTIONS)
         if self.is_debug_on:
             self.draw_debug_overlay()
 
     def draw_debug_overlay(self) -> None:
-        """Displays and updates text of FPS count 
-        (and maybe later other informations) on the screen"""
-        obj_count = len(self.asteroids) + len(self.missles) + len(self.animations)
-        self.canvas.create_text(FONT_SIZE*4, HEIGHT-(FONT_SIZE+2), 
-            text=f"FPS: {self.get_FPS()}", 
-            fill=TEXT_COLOR, font=(FONT, FONT_SIZE, FONT_STYLE))
-
-    def shoot(self) -> None:
-        if self.player.can_shoot():
-            new_missle = self.player.shoot()
-            self.missles.append(new_missle)
-      
+        """Displays and updates text of FPS count and the frame profile on the screen.
+        The profile is refreshed a few times per second to keep it readable."""
+        self.renderer.text(FONT_SIZE*4, HEIGHT-(FONT_SIZE+2), f"FPS: {self.get_FPS()}")
+        if self.profiler.frame_count % 25 == 0:
+            self.profile_text = self.get_profile_text()
+        self.renderer.text(2, FONT_SIZE*3, self.profile_text, size=FONT_SIZE-3, anchor="nw")
+
+    def get_profile_text(self) -> str:
+        """Returns the frame time percentiles, the average phase times, the object
+        counts by type, the canvas item count and the quality level as text lines"""
+        frame = self.profiler.get_frame_percentiles()
+        lines = ["frame ms p50/p95/p99/max: "
+                 + "/".join(f"{frame[key]:.1f}" for key in ("p50", "p95", "p99", "max"))]
+        lines += [f"{phase}: {ms:.2f} ms" for phase, ms in self.profiler.get_phase_means().items()]
+        counts = Counter(type(obj).__name__ for obj in self.world.get_objects())
+        lines += [f"{name}: {count}" for name, count in sorted(counts.items())]
+        lines.append(f"particles: {len(self.world.particles)}/{self.world.particles.capacity}")
+        lines += [pool.get_stats() for pool in self.world.get_pools()]
+        lines.append(f"{type(self.renderer).__name__} canvas items: {self.renderer.item_count}")
+        lines.append(f"quality {self.governor.level}: {self.governor.get_level()}")
+        return "\n".join(lines)
+
     def pause(self) -> None:
         """Pauses or upauses the game"""
-        if self.is_game_over:
+        if self.world.is_game_over:
             return
         if self.is_paused:
             self.is_paused = False
+            if self.after_id is not None:
+                self.canvas.after_cancel(self.after_id)
+            self.reset_clock()
             self.loop()
         else:
             self.is_paused = True
@@ -250,40 +235,25 @@ class GameScreen(Screen):
 
     def start_new_game(self):
         """Restarts the game"""
-        if not self.is_game_over:
+        if not self.world.is_game_over:
             return
-        self.is_game_over = False
         self.create_new_game()
         self.is_paused = False
         self.loop()
 
     def key_press_command(self, event) -> None:
         match event.keysym:
-            case 'w'|'Up':
-                self.is_accelerating = True
-            case 'a'|'Left':
-                self.is_turning_left = True
-            case 'd'|'Right':
-                self.is_turning_right = True
-            case 'space':
-                self.is_shooting = True
             case 'p':
                 self.pause()
             case 'n':
                 self.start_new_game()
             case "F12":
                 self.switch_debug()
+            case other:
+                self.input_provider.set_key(event.keysym, True)
 
     def key_release_command(self, event) -> None:
-        match event.keysym:
-            case 'w'|'Up':
-                self.is_accelerating = False
-            case 'a'|'Left':
-                self.is_turning_left = False
-            case 'd'|'Right':
-                self.is_turning_right = False
-            case 'space':
-                self.is_shooting = False
+        self.input_provider.set_key(event.keysym, False)
 
 
 class StartScreen(Screen):
@@ -298,30 +268,31 @@ class StartScreen(Screen):
         button_width = WIDTH//3
         button_height = HEIGHT//10
         spacing = int(button_height*1.5)
-        self.buttons.append(Button(self.canvas, Vector2D(WIDTH//2, HEIGHT//2), button_width, button_height, "NEW GAME"))
-        self.buttons.append(Button(self.canvas, Vector2D(WIDTH//2, HEIGHT//2+spacing), button_width, button_height, "HIGHSCORES"))
-        self.buttons.append(Button(self.canvas, Vector2D(WIDTH//2, HEIGHT//2+(spacing*2)), button_width, button_height, "QUIT"))
+        self.buttons.append(Button(Vector2D(WIDTH//2, HEIGHT//2), button_width, button_height, "NEW GAME"))
+        self.buttons.append(Button(Vector2D(WIDTH//2, HEIGHT//2+spacing), button_width, button_height, "HIGHSCORES"))
+        self.buttons.append(Button(Vector2D(WIDTH//2, HEIGHT//2+(spacing*2)), button_width, button_height, "QUIT"))
 
     def draw(self) -> None:
-        self.canvas.delete("all")
-        self.canvas.create_text(WIDTH//2, HEIGHT//4, 
-                text=TITLE.upper(), 
-                fill=TEXT_COLOR, font=(FONT, WIDTH//12, FONT_STYLE))
+        self.renderer.clear()
+        self.renderer.text(WIDTH//2, HEIGHT//4, TITLE.upper(), size=WIDTH//12)
         for index, button in enumerate(self.buttons):
             if index == self.active_button_index:
                 button.is_active = True
             else:
                 button.is_active = False
-            button.draw()
+            button.draw(self.renderer)
+        self.renderer.present()
 
     def key_press_command(self, event) -> None:
         match event.keysym:
             case "Down":
                 self.active_button_index = (self.active_button_index+1) % len(self.buttons)
+                self.request_redraw()
             case "Up":
                 self.active_button_index -= 1
                 if self.active_button_index == -1:
                     self.active_button_index = len(self.buttons)-1
+                self.request_redraw()
             case "Return":
                 self.button_action()
     
@@ -340,10 +311,10 @@ class StartScreen(Screen):
                 self.app.destroy()
     
     def loop(self) -> None:
-        if self.end:
+        if self.end or not self.is_dirty:
             return
+        self.is_dirty = False
         self.draw()
-        self.canvas.after(REFRESH_RATE, self.loop)
 
 
 class HighScoresScreen(Screen):
@@ -352,38 +323,61 @@ class HighScoresScreen(Screen):
         self.init_buttons()
         self.end = False
         self.score_table = HighScoreTable("highscores")
+        self.is_save_failed = False
         if not name == "default":
-            self.score_table.write_entry(name, score)
+            # the entry is shown immediately, the file is written in the background
+            self.score_table.submit_entry(name, score, self.on_entry_saved)
+            self.canvas.after(HIGHSCORE_RESULT_RATE, self.check_saved)
+        self.canvas.after(HIGHSCORE_POLL_RATE, self.poll_scores)
     
     def init_buttons(self):
         self.buttons = []
         button_width = WIDTH//3
         button_height = HEIGHT//10
-        self.buttons.append(Button(self.canvas, Vector2D(WIDTH//2, HEIGHT//7*6), button_width, button_height, "MAIN MENU"))
+        self.buttons.append(Button(Vector2D(WIDTH//2, HEIGHT//7*6), button_width, button_height, "MAIN MENU"))
         self.active_button_index = 0
 
     def draw(self):
-        self.canvas.delete("all")
-        self.canvas.create_text(WIDTH//2, HEIGHT//6, 
-                text="HIGHSCORES", 
-                fill=TEXT_COLOR, font=(FONT, WIDTH//16, FONT_STYLE))
+        self.renderer.clear()
+        self.renderer.text(WIDTH//2, HEIGHT//6, "HIGHSCORES", size=WIDTH//16)
         for index, button in enumerate(self.buttons):
             if index == self.active_button_index:
                 button.is_active = True
             else:
                 button.is_active = False
-            button.draw()
+            button.draw(self.renderer)
         spacing = HEIGHT//12
         for ind, entry in enumerate(self.score_table.top_scores(5)):
-            self.canvas.create_text(WIDTH//2, (HEIGHT//3)+(spacing*ind), 
-                text=entry, 
-                fill=TEXT_COLOR, font=("Impact", spacing//2, "normal"))
+            self.renderer.text(WIDTH//2, (HEIGHT//3)+(spacing*ind), entry,
+                               size=spacing//2, font="Impact", style="normal")
+        if self.is_save_failed:
+            self.renderer.text(WIDTH//2, HEIGHT//4, "SCORE NOT SAVED", color="red", size=spacing//3)
+        self.renderer.present()
     
     def loop(self):
-        if self.end:
+        if self.end or not self.is_dirty:
             return
+        self.is_dirty = False
         self.draw()
-        self.canvas.after(REFRESH_RATE, self.loop)
+
+    def check_saved(self) -> None:
+        """Delivers the results of the background writes on the Tk thread"""
+        if self.score_table.process_results():
+            self.canvas.after(HIGHSCORE_RESULT_RATE, self.check_saved)
+
+    def on_entry_saved(self, error: OSError | None) -> None:
+        if error is not None:
+            self.is_save_failed = True
+            print(f"Couldn't save the high score: {error}", file=sys.stderr)
+        self.request_redraw()
+
+    def poll_scores(self) -> None:
+        """Redraws the table if the high score file was changed by someone else"""
+        if self.end:
+            return
+        if not self.score_table.is_cache_valid():
+            self.request_redraw()
+        self.canvas.after(HIGHSCORE_POLL_RATE, self.poll_scores)
 
     def key_press_command(self, event) -> None:
         if event.keysym == "Return":
@@ -406,35 +400,29 @@ class EndScreen(Screen):
         button_width = WIDTH//3
         button_height = HEIGHT//16
         spacing = int(button_height*1.5)
-        self.buttons.append(Button(self.canvas, Vector2D(WIDTH//2, HEIGHT//3*2), button_width, button_height, "SUBMIT SCORE"))
-        self.buttons.append(Button(self.canvas, Vector2D(WIDTH//2, HEIGHT//3*2+spacing), button_width, button_height, "RESTART"))
-        self.buttons.append(Button(self.canvas, Vector2D(WIDTH//2, HEIGHT//3*2+(spacing*2)), button_width, button_height, "MAIN MENU"))
+        self.buttons.append(Button(Vector2D(WIDTH//2, HEIGHT//3*2), button_width, button_height, "SUBMIT SCORE"))
+        self.buttons.append(Button(Vector2D(WIDTH//2, HEIGHT//3*2+spacing), button_width, button_height, "RESTART"))
+        self.buttons.append(Button(Vector2D(WIDTH//2, HEIGHT//3*2+(spacing*2)), button_width, button_height, "MAIN MENU"))
 
     def loop(self):
-        if self.end:
+        if self.end or not self.is_dirty:
             return
-        self.canvas.delete("all")
+        self.is_dirty = False
         self.draw()
-        self.canvas.after(REFRESH_RATE, self.loop)
-
-    def draw(self) -> None:       
-        self.canvas.delete("all")
-        self.canvas.create_text(WIDTH//2, HEIGHT//5, 
-                text=f"SCORE: {self.score}", 
-                fill=TEXT_COLOR, font=(FONT, WIDTH//20, FONT_STYLE))
-        self.canvas.create_text(WIDTH//2, HEIGHT//3, 
-                text=f"ENTER YOUR NAME:", 
-                fill=TEXT_COLOR, font=(FONT, WIDTH//30, FONT_STYLE))
+
+    def draw(self) -> None:
+        self.renderer.clear()
+        self.renderer.text(WIDTH//2, HEIGHT//5, f"SCORE: {self.score}", size=WIDTH//20)
+        self.renderer.text(WIDTH//2, HEIGHT//3, "ENTER YOUR NAME:", size=WIDTH//30)
         for i, letter in enumerate(self.letter_slots):
-            self.canvas.create_text(WIDTH//2 + ((i-1)*WIDTH//8), HEIGHT//2, 
-                text=letter, 
-                fill=TEXT_COLOR, font=(FONT, WIDTH//16, FONT_STYLE))
+            self.renderer.text(WIDTH//2 + ((i-1)*WIDTH//8), HEIGHT//2, letter, size=WIDTH//16)
         for index, button in enumerate(self.buttons):
             if index == self.active_button_index:
                 button.is_active = True
             else:
                 button.is_active = False
-            button.draw()
+            button.draw(self.renderer)
+        self.renderer.present()
     
     def key_release_command(self, event):
         match event.keysym:
@@ -455,6 +443,8 @@ class EndScreen(Screen):
                 if len(event.keysym) == 1 and event.keysym.isalnum() and self.active_letter_index < 3:
                     self.letter_slots[self.active_letter_index] = event.keysym.upper()
                     self.active_letter_index = self.active_letter_index+1
+        if not self.end:
+            self.request_redraw()
     
     def button_action(self) -> None:
         match self.active_button_index:
@@ -470,15 +460,14 @@ class EndScreen(Screen):
 
 
 class Button:
-    def __init__(self, canvas: tk.Canvas, position: Vector2D, width: int, height: int, text: str):
-        self.canvas = canvas
+    def __init__(self, position: Vector2D, width: int, height: int, text: str):
         self.center = position
         self.width = width
         self.height = height
         self.text = text
         self.is_active = False
 
-    def draw(self):
+    def draw(self, renderer: Renderer):
         x0, y0 = self.center.x - self.width//2, self.center.y - self.height/2
         x1, y1 = self.center.x + self.width//2, self.center.y + self.height/2
         fill_color = BG
@@ -487,8 +476,5 @@ class Button:
         if self.is_active:
             fill_color = TEXT_COLOR
             text_color = BG
-        self.canvas.create_rectangle(x0, y0, x1, y1, fill=fill_color, outline=outline_)
-        self.canvas.create_text(self.center.x, self.center.y, text=self.text, fill= text_color, font=(FONT, self.height//2, FONT_STYLE))
-    
-
-    
+        renderer.rect([x0, y0, x1, y1], fill=fill_color, outline=outline_)
+        renderer.text(self.center.x, self.center.y, self.text, text_color, self.height//2)
@@ -0,0 +1,58 @@
+from config import *
+
+
+class SpatialHash:
+    """Uniform grid over the toroidal play field for the broad phase of the
+    collision detection. Objects are registered in every cell their bounding
+    circle overlaps, cells wrap around the window edges like the objects do."""
+    def __init__(self, cell_size: int = GRID_CELL_SIZE, width: int = WIDTH, height: int = HEIGHT) -> None:
+        self.cell_size = cell_size
+        self.width = width
+        self.height = height
+        self.columns = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.cells = {}
+        self.order = {}
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.order.clear()
+
+    def get_cells(self, obj) -> list[tuple[int, int]]:
+        """Returns the (column, row) indexes of the cells covered by the
+        bounding circle of [obj], wrapped around the edges"""
+        radius = obj.bounding_radius
+        columns = self.get_span(obj.center.x - radius, obj.center.x + radius, self.width, self.columns)
+        rows = self.get_span(obj.center.y - radius, obj.center.y + radius, self.height, self.rows)
+        return [(column, row) for column in columns for row in rows]
+
+    def get_span(self, start: float, end: float, length: int, count: int) -> range | list[int]:
+        # one extra cell is added, because the last cell can be narrower
+        # than the others when the window size is not a multiple of the cell size
+        span = int(end // self.cell_size - start // self.cell_size) + 2
+        if span >= count:
+            return range(count)
+        first = int((start % length) // self.cell_size)
+        return [(first + i) % count for i in range(span)]
+
+    def insert(self, obj) -> None:
+        self.order[id(obj)] = len(self.order)
+        for cell in self.get_cells(obj):
+            self.cells.setdefault(cell, []).append(obj)
+
+    def rebuild(self, *groups) -> None:
+        """Clears the grid and inserts all objects of the given lists"""
+        self.clear()
+        for group in groups:
+            for obj in group:
+                self.insert(obj)
+
+    def nearby(self, obj) -> list:
+        """Returns the registered objects sharing a cell with [obj],
+        in insertion order and without duplicates"""
+        found = {}
+        for cell in self.get_cells(obj):
+            for other in self.cells.get(cell, ()):
+                if other is not obj:
+                    found[id(other)] = other
+        return sorted(found.values(), key=lambda other: self.order[id(other)])
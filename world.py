@@ -0,0 +1,243 @@
+import random
+import struct
+import zlib
+from config import *
+from model import Vector2D, random_vector, random_bool, set_rng
+from objects import *
+from spatial import SpatialHash
+from physics import make_body_store, BodyStore
+from particles import make_particle_system
+from pool import ObjectPool
+from entities import EntityManager
+from profiler import FrameProfiler
+
+
+class PlayerInput:
+    """State of the player's controls in one frame"""
+    def __init__(self, is_accelerating: bool = False, is_turning_left: bool = False,
+                 is_turning_right: bool = False, is_shooting: bool = False) -> None:
+        self.is_accelerating = is_accelerating
+        self.is_turning_left = is_turning_left
+        self.is_turning_right = is_turning_right
+        self.is_shooting = is_shooting
+
+    def to_bits(self) -> int:
+        """Returns the controls packed into the lowest 4 bits of an int"""
+        return (self.is_accelerating | self.is_turning_left << 1
+                | self.is_turning_right << 2 | self.is_shooting << 3)
+
+    @classmethod
+    def from_bits(cls, bits: int) -> "PlayerInput":
+        return PlayerInput(bool(bits & 1), bool(bits & 2), bool(bits & 4), bool(bits & 8))
+
+
+class World:
+    """The simulation of one game: owns every object, the lives, the score
+    and the levels. It doesn't need tkinter, screens draw its objects.
+    The same [seed] and inputs always give the same game."""
+    def __init__(self, profiler: FrameProfiler | None = None, seed: int | None = None,
+                 use_arrays: bool = ARRAY_PHYSICS) -> None:
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.player = Player(Vector2D(WIDTH//2, HEIGHT//2), size = PLAYER_SIZE)
+        self.entities = EntityManager()
+        self.entities.register(self.player)
+        self.asteroids = self.entities.create_view()
+        self.missles = self.entities.create_view()
+        self.animations = self.entities.create_view()
+        self.pick_ups = self.entities.create_view()
+        self.levels = START_LEVEL
+        self.score = 0
+        self.lives = START_LIVES
+        self.frames = 0
+        self.is_new_wave = True
+        self.is_game_over = False
+        self.grid = SpatialHash(GRID_CELL_SIZE, WIDTH, HEIGHT)
+        self.bodies = make_body_store(use_arrays)
+        self.particles = make_particle_system(use_arrays)
+        self.missle_pool = ObjectPool(Missle)
+        self.asteroid_pool = ObjectPool(Asteroid)
+        self.pick_up_pool = ObjectPool(HealthPickUp)
+        self.pools = {Missle: self.missle_pool, Asteroid: self.asteroid_pool,
+                      HealthPickUp: self.pick_up_pool}
+        self.uses_arrays = isinstance(self.bodies, BodyStore)
+
+    def step(self, inputs: PlayerInput) -> None:
+        """Advances the game by one frame with the given player [inputs]."""
+        if self.is_game_over:
+            return
+        set_rng(self.rng)
+        if self.lives < 0:
+            if not self.player.is_destroyed:
+                self.animations.add(TextAnimation(Vector2D(WIDTH//2, HEIGHT//4), 280, "GAME OVER", WIDTH//20))
+                self.animations.add(PlayerExplosionAnimation(self.particles, self.player, 280))
+                self.animations.add(ExplosionAnimation(self.particles, self.player.center, 30, PLAYER_COLOR))
+                self.player.is_destroyed = True
+            if len(self.animations) == 0:
+                self.is_game_over = True
+        mark = self.profiler.mark
+        self.level_controller()
+        mark("level_controller")
+        self.bodies.step()
+        mark("physics")
+        self.update_asteroids()
+        mark("asteroids")
+        self.update_missles()
+        mark("missles")
+        self.update_pick_ups()
+        mark("pick_ups")
+        self.update_player(inputs)
+        mark("player")
+        self.update_animations()
+        mark("animations")
+        self.remove_disposed()
+        self.frames += 1
+
+    def remove_disposed(self) -> None:
+        '''Compacts the object views at the end of the frame and gives
+        the removed objects back to their pools'''
+        for obj in self.entities.flush():
+            pool = self.pools.get(type(obj))
+            if pool is not None:
+                pool.release(obj)
+
+    def update_asteroids(self) -> None:
+        self.grid.rebuild([self.player], self.missles)
+        for asteroid in self.asteroids:
+            self.detect_collision(asteroid)
+            asteroid.update()
+            if asteroid.is_to_dispose:
+                self.bodies.remove(asteroid)
+                self.asteroids.remove(asteroid)
+
+    def update_missles(self) -> None:
+        for missle in self.missles:
+            if missle.is_to_dispose:
+                self.bodies.remove(missle)
+                self.missles.remove(missle)
+            else:
+                missle.update()
+
+    def update_player(self, inputs: PlayerInput) -> None:
+        self.player.is_accelerating = False
+        if inputs.is_shooting:
+            self.shoot()
+        if inputs.is_accelerating:
+            self.player.accelerate()
+        if inputs.is_turning_left:
+            self.player.rotate(TURNING_RATE)
+        if inputs.is_turning_right:
+            self.player.rotate(-TURNING_RATE)
+        self.player.update()
+
+    def update_animations(self) -> None:
+        for animation in self.animations:
+            if animation.is_disposable:
+                self.animations.remove(animation)
+            else:
+                animation.update()
+        self.particles.step()
+
+    def update_pick_ups(self) -> None:
+        self.grid.rebuild(self.pick_ups)
+        nearby_pick_ups = self.grid.nearby(self.player)
+        for pick_up in self.pick_ups:
+            if pick_up in nearby_pick_ups and pick_up.is_collide_with(self.player):
+                pick_up.is_to_dispose = True
+                self.lives += 1
+                self.animations.add(TextAnimation(Vector2D(pick_up.center.x,pick_up.center.y),
+                                                 40, "+1", FONT_SIZE, color='red'))
+
+            if pick_up.is_to_dispose:
+                self.pick_ups.remove(pick_up)
+            else:
+                pick_up.update()
+
+    def detect_collision(self, asteroid: Asteroid) -> None:
+        '''Detect collision with Player or missles. Only the objects sharing
+        a grid cell with the asteroid are checked.'''
+        nearby = self.grid.nearby(asteroid)
+        if self.player in nearby and asteroid.is_collide_with(self.player):
+            self.player_collision(asteroid)
+            return
+        for missle in nearby:
+            if missle is not self.player and asteroid.is_collide_with(missle):
+                self.missle_collision(missle, asteroid)
+
+    def level_controller(self) -> None:
+        """Starts a new level by adding new asteroids to the room
+        when all of the existing ones were destroyed"""
+        if self.is_new_wave:
+            self.levels += 1
+            for i in range(self.levels):
+                self.add_asteroid(self.asteroid_pool.acquire(self.safe_distance_position(100),
+                                                             ASTEROID_SIZE, AsteroidType.WHOLE))
+            self.animations.add(TextAnimation(Vector2D(WIDTH//2, HEIGHT//3),
+                                                 80, f"ROUND {self.levels}", FONT_SIZE*2))
+            self.is_new_wave = False
+        if not self.asteroids and not self.animations and not self.missles:
+            self.is_new_wave = True
+
+    def safe_distance_position(self, distance: int) -> Vector2D:
+        """Returns a random position (Vector2D) outside the given [distance] from the player,
+        but inside the window. It's for adding new asteroids to the room.
+        """
+        position = random_vector(0, WIDTH, 0, HEIGHT)
+        while self.player.center.distance_sq(position) < distance*distance:
+            position = random_vector(0, WIDTH, 0, HEIGHT)
+        return position
+
+    def player_collision(self, asteroid: Asteroid) -> None:
+        """Handles the asteroid's collision with the Player"""
+        if self.player.is_invincible:
+            return
+        if self.player.is_destroyed:
+            return
+        for child in asteroid.destroy(self.asteroid_pool):
+            self.add_asteroid(child)
+        self.lives -= 1
+        self.player.set_invincible()
+        self.animations.add(ExplosionAnimation(self.particles, asteroid.center, 50))
+
+    def missle_collision(self, missle: Missle, asteroid: Asteroid) -> None:
+        """Handles the asteroid's collision with a missle"""
+        if missle.is_to_dispose:
+            return
+        missle.is_to_dispose = True
+        for child in asteroid.destroy(self.asteroid_pool):
+            self.add_asteroid(child)
+        if asteroid.type is AsteroidType.QUARTER and random_bool(HEALTH_DROP_FREQ):
+            self.pick_ups.add(self.pick_up_pool.acquire(asteroid.center, 10))
+        self.score += 1
+        self.animations.add(ExplosionAnimation(self.particles, asteroid.center, 50))
+
+    def shoot(self) -> None:
+        if self.player.can_shoot():
+            new_missle = self.player.shoot(self.missle_pool)
+            self.bodies.add(new_missle)
+            self.missles.add(new_missle)
+
+    def add_asteroid(self, asteroid: Asteroid) -> None:
+        self.bodies.add(asteroid)
+        self.asteroids.add(asteroid)
+
+    def get_checksum(self) -> int:
+        """Returns a CRC32 of the game state, to check that a replayed game
+        ended exactly like the recorded one"""
+        values = [self.frames, self.score, self.lives, self.levels, self.player.heading,
+                  self.player.center.x, self.player.center.y]
+        for obj in [*self.asteroids, *self.missles, *self.pick_ups]:
+            values += [obj.center.x, obj.center.y, obj.heading]
+        return zlib.crc32(struct.pack(f"<{len(values)}d", *values))
+
+    def get_pools(self) -> list[ObjectPool]:
+        return [self.asteroid_pool, self.missle_pool, self.pick_up_pool]
+
+    def get_space_objects(self) -> list[SpaceObject]:
+        """Returns every space object, in drawing order"""
+        return [*self.asteroids, *self.missles, *self.pick_ups, self.player]
+
+    def get_objects(self) -> list:
+        """Returns every object to be drawn, in drawing order"""
+        return self.get_space_objects() + list(self.animations)